@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Benchmark CV batch rendering with and without the fragment cache
+
+shared:  variants that differ only in their summary of qualifications
+distinct: variants where every string differs, so no fragment is ever reused
+
+Times are per rendered CV with a warm template, as in a batch worker.
+"""
+
+import sys
+import time
+
+from builder.builder import load_data, render_cv
+from builder.fragments import FragmentCache
+from builder.template_env import get_tex_env
+from models.schema import CurriculumVitae
+
+
+def suffix_strings(value, suffix):
+    if isinstance(value, str):
+        return f"{value} {suffix}"
+    if isinstance(value, dict):
+        return {key: suffix_strings(item, suffix) for key, item in value.items()}
+    if isinstance(value, list):
+        return [suffix_strings(item, suffix) for item in value]
+    return value
+
+
+def variants(data, count, distinct):
+    for n in range(count):
+        if distinct:
+            yield suffix_strings(data, f"v{n}")
+        else:
+            yield {**data, "summary_of_qualifications": [f"Variant {n}"]}
+
+
+def time_batch(template, inputs, fragments):
+    start = time.perf_counter()
+    for data in inputs:
+        render_cv(data, template, validated=True, fragments=fragments)
+    return (time.perf_counter() - start) / len(inputs)
+
+
+def run_benchmark(count=200, repeat=5):
+    data = CurriculumVitae(**load_data("data/cv.yaml")).model_dump()
+    template = get_tex_env(cache_dir=None).get_template("cv.tex")
+
+    print(f"cv.tex, {count} variants (best of {repeat})")
+    for label, distinct in (("shared", False), ("distinct", True)):
+        inputs = list(variants(data, count, distinct))
+        plain, cached = [], []
+        # Interleaved so that drift in machine load hits both sides equally
+        for _ in range(repeat):
+            plain.append(time_batch(template, inputs, None))
+            cached.append(time_batch(template, inputs, FragmentCache()))
+        print(
+            f"  {label:<9} plain {min(plain) * 1e6:7.1f} µs"
+            f"  fragments {min(cached) * 1e6:7.1f} µs"
+        )
+
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Import-time budget check for the CLI entry points
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter for each
+entry point module, parses the cumulative import time, and fails if it exceeds
+its budget or if any heavy dependency was imported eagerly.
+
+Usage:
+    python -m scripts.bench_import_time [--repeat N] [--scale FACTOR]
+"""
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+
+# module -> budget in milliseconds (median cumulative import time)
+BUDGETS_MS = {
+    "optimizer.cli": 150,
+    "builder.cli": 50,
+}
+
+# Packages that must only be imported once a crew or a build actually runs
+DEFERRED_PACKAGES = [
+    "crewai",
+    "crewai_tools",
+    "langchain",
+    "langchain_core",
+    "langchain_chroma",
+    "langchain_openai",
+    "chromadb",
+    "openai",
+    "anthropic",
+    "jsonschema",
+    "jinja2",
+]
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)$")
+
+
+def measure(module: str):
+    """Return (cumulative_us, imported_modules) for importing module once"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative = None
+    imported = set()
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        name = match.group(4)
+        imported.add(name)
+        if name == module:
+            cumulative = int(match.group(2))
+    return cumulative, imported
+
+
+def run_benchmark(repeat: int = 5, scale: float = 1.0) -> bool:
+    ok = True
+    for module, budget_ms in BUDGETS_MS.items():
+        samples = []
+        imported = set()
+        for _ in range(repeat):
+            cumulative, imported = measure(module)
+            samples.append(cumulative / 1000)
+
+        median_ms = statistics.median(samples)
+        limit_ms = budget_ms * scale
+        eager = sorted(
+            package
+            for package in DEFERRED_PACKAGES
+            if any(name == package or name.startswith(package + ".") for name in imported)
+        )
+
+        status = "✅" if median_ms <= limit_ms and not eager else "❌"
+        print(f"{status} {module}: {median_ms:.1f} ms (budget {limit_ms:.0f} ms, median of {repeat})")
+        if eager:
+            print(f"   eagerly imported: {', '.join(eager)}")
+        ok = ok and status == "✅"
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="Multiply every budget, e.g. on slow CI machines",
+    )
+    args = parser.parse_args()
+    sys.exit(0 if run_benchmark(args.repeat, args.scale) else 1)
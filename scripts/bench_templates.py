@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""Benchmark cold vs warm template load + render times
+
+cold:     fresh environment, empty compiled-template cache (lex, parse, compile)
+warm:     fresh environment, populated compiled-template cache (load bytecode)
+no-cache: fresh environment with the cache disabled, for reference
+"""
+
+import statistics
+import sys
+import tempfile
+import time
+
+from builder.builder import load_data, render_cv, render_cover_letter
+from builder.template_env import get_tex_env
+
+CASES = [
+    ("cv.tex", "data/cv.yaml", render_cv),
+    ("cover-letter.tex", "data/cover-letter.json", render_cover_letter),
+]
+
+
+def time_render(template_name, data, render, cache_dir):
+    start = time.perf_counter()
+    template = get_tex_env(cache_dir=cache_dir).get_template(template_name)
+    render(data, template)
+    return time.perf_counter() - start
+
+
+def run_benchmark(repeat=20):
+    for template_name, input_file, render in CASES:
+        data = load_data(input_file)
+        cold, warm, uncached = [], [], []
+        for _ in range(repeat):
+            with tempfile.TemporaryDirectory() as cache_dir:
+                cold.append(time_render(template_name, data, render, cache_dir))
+                warm.append(time_render(template_name, data, render, cache_dir))
+            uncached.append(time_render(template_name, data, render, None))
+
+        print(f"{template_name} (median of {repeat})")
+        for label, samples in (("cold", cold), ("warm", warm), ("no-cache", uncached)):
+            print(f"  {label:<9} {statistics.median(samples) * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -1,10 +1,13 @@
+import sys
 from optimizer.embedder import KnowledgeBaseEmbedder
 from optimizer.config.settings import get_config
 
+# Incremental by default; --force re-embeds the whole knowledge base
 embedder = KnowledgeBaseEmbedder(
     knowledge_base_abspath=get_config().knowledge_base_abspath,
     vector_db_abspath=get_config().vector_db_abspath,
-    force_rebuild=True,
+    force_rebuild="--force" in sys.argv[1:],
+    embedding_store_abspath=get_config().embedding_store_abspath,
 )
 
 embedder.build_if_needed()
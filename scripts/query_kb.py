@@ -6,17 +6,27 @@ import warnings
 
 from optimizer.tools.knowledge_base_tool import KnowledgeBaseTool
 from optimizer.config.settings import get_config
+from optimizer.utils.embedding_cache import get_embedding_cache
 
 
 def run_query(query=None):
     if query is None:
         query = "data analysis experience"
     config = get_config()
-    tool = KnowledgeBaseTool(vector_db_path=config.vector_db_abspath)
+    tool = KnowledgeBaseTool(
+        vector_db_path=config.vector_db_abspath,
+        embedding_cache_path=config.embedding_cache_abspath,
+    )
     result = tool._run(query)
     print("QUERY RESULT:")
     print(result)
 
+    stats = get_embedding_cache(config.embedding_cache_abspath).stats()
+    print(
+        f"\nEmbedding cache: {stats['hits']} hits ({stats['disk_hits']} from disk), "
+        f"{stats['misses']} misses, {stats['disk_entries']} entries on disk"
+    )
+
 
 if __name__ == "__main__":
     warnings.filterwarnings("ignore", category=DeprecationWarning)
@@ -0,0 +1,250 @@
+"""Batch rendering of many CV / cover letter inputs with a shared warm environment"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+from builder.builder import render_cv, render_cover_letter, write_if_changed
+from builder.fragments import FragmentCache
+from builder.input_cache import DEFAULT_INPUT_CACHE_DIR, load_validated
+from builder.manifest import BuildManifest, MANIFEST_NAME, file_hash, template_hash
+from builder.template_env import DEFAULT_CACHE_DIR, get_tex_env
+from models.schema import CurriculumVitae, CoverLetter
+
+INPUT_SUFFIXES = (".json", ".yaml", ".yml")
+
+RENDERERS = {
+    "cv": ("cv.tex", render_cv),
+    "cover-letter": ("cover-letter.tex", render_cover_letter),
+}
+
+# Document kinds that can reuse rendered sections across inputs (fragments=True)
+FRAGMENT_CACHED = {"cv"}
+
+MODELS = {
+    "cv": CurriculumVitae,
+    "cover-letter": CoverLetter,
+}
+
+# Per-process state, populated once by _init_worker
+_worker_template = None
+_worker_render = None
+_worker_model = None
+_worker_options = {}
+_worker_input_cache_dir = None
+
+
+@dataclass
+class BatchResult:
+    """Outcome of rendering a single input file in a batch"""
+
+    input_file: str
+    output_file: str
+    seconds: float
+    error: Optional[str] = None
+    skipped: bool = False
+    tex_hash: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def collect_inputs(source: str) -> List[Path]:
+    """Resolve a directory or manifest file into a list of input files
+
+    A directory yields every JSON/YAML file directly inside it. A manifest is a
+    text file listing one input path per line; relative paths are resolved
+    against the manifest's directory, and blank lines and lines starting with
+    `#` are ignored.
+    """
+    path = Path(source)
+    if path.is_dir():
+        return sorted(p for p in path.iterdir() if p.suffix.lower() in INPUT_SUFFIXES)
+
+    inputs = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            entry = Path(line)
+            inputs.append(entry if entry.is_absolute() else path.parent / entry)
+    return inputs
+
+
+def output_paths(inputs: List[Path], output_dir: str) -> List[str]:
+    """Map each input to `<output_dir>/<input stem>.tex`
+
+    Raises:
+        ValueError: If two inputs share a stem (say `a/cv.yaml` and
+            `b/cv.json`) and would be rendered into the same output file
+    """
+    outputs = [os.path.join(output_dir, f"{input_file.stem}.tex") for input_file in inputs]
+    claimed = {}
+    for input_file, output_file in zip(inputs, outputs):
+        if output_file in claimed:
+            raise ValueError(
+                f"{claimed[output_file]} and {input_file} would both be rendered to "
+                f"{output_file}; rename one of them"
+            )
+        claimed[output_file] = input_file
+    return outputs
+
+
+def _init_worker(
+    kind: str,
+    template_dir: str,
+    pre_escaped: bool = False,
+    fragments: bool = False,
+    cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+    input_cache_dir: Optional[str] = DEFAULT_INPUT_CACHE_DIR,
+) -> None:
+    global _worker_template, _worker_render, _worker_model, _worker_options
+    global _worker_input_cache_dir
+    template_name, _worker_render = RENDERERS[kind]
+    _worker_model = MODELS[kind]
+    _worker_input_cache_dir = input_cache_dir
+    _worker_options = (
+        {"fragments": FragmentCache()} if fragments and kind in FRAGMENT_CACHED else {}
+    )
+    env = get_tex_env(template_dir, cache_dir=cache_dir, pre_escaped=pre_escaped)
+    _worker_template = env.get_template(template_name)
+
+
+def _render_one(input_file: str, output_file: str, force: bool = False) -> BatchResult:
+    start = time.perf_counter()
+    try:
+        data = load_validated(input_file, _worker_model, _worker_input_cache_dir)
+        rendered_tex = _worker_render(data, _worker_template, validated=True, **_worker_options)
+        written, tex_hash = write_if_changed(output_file, rendered_tex, force)
+    except Exception as e:
+        return BatchResult(
+            input_file, output_file, time.perf_counter() - start, f"{type(e).__name__}: {e}"
+        )
+    return BatchResult(
+        input_file,
+        output_file,
+        time.perf_counter() - start,
+        skipped=not written,
+        tex_hash=tex_hash,
+    )
+
+
+def build_batch(
+    source: str,
+    output_dir: str,
+    kind: str = "cv",
+    workers: Optional[int] = None,
+    template_dir: str = "templates",
+    pre_escaped: bool = False,
+    force: bool = False,
+    fragments: bool = False,
+    cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+    input_cache_dir: Optional[str] = DEFAULT_INPUT_CACHE_DIR,
+) -> List[BatchResult]:
+    """Render every input listed by a directory or manifest into output_dir
+
+    Each worker process builds one TexEnvironment and compiles the template once,
+    then renders all inputs assigned to it. Failures are recorded per file and do
+    not stop the rest of the batch. Inputs whose output is current according to
+    the build manifest in output_dir are skipped without being sent to a worker.
+
+    Args:
+        source: Directory of JSON/YAML inputs or a manifest file listing them
+        output_dir: Directory that receives one `<input stem>.tex` per input
+        kind: Either "cv" or "cover-letter"
+        workers: Number of worker processes; defaults to the CPU count, and 1
+            renders in the current process
+        template_dir: Directory containing the LaTeX templates
+        pre_escaped: Escape each input's data tree once before rendering
+            instead of escaping every interpolated string
+        force: Render and write every output even if nothing changed
+        fragments: Reuse rendered CV sections identical to ones the worker
+            already rendered; only faster when variants share large sections
+        cache_dir: Directory for the compiled-template cache, or None to
+            disable it
+        input_cache_dir: Directory for cached validated input data, or None
+            to always parse and validate
+
+    Returns:
+        One BatchResult per input, in input order
+
+    Raises:
+        ValueError: If two inputs would be rendered to the same output file
+    """
+    if kind not in RENDERERS:
+        raise ValueError(f"Unknown document kind: {kind}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    template_name = RENDERERS[kind][0]
+    env = get_tex_env(template_dir, cache_dir=cache_dir, pre_escaped=pre_escaped)
+    tex_template_hash = template_hash(env, template_name)
+    manifest = BuildManifest(os.path.join(output_dir, MANIFEST_NAME))
+
+    inputs = collect_inputs(source)
+    results = {}
+    input_hashes = {}
+    jobs = []
+    for input_file, output_file in zip(inputs, output_paths(inputs, output_dir)):
+        start = time.perf_counter()
+        job = (str(input_file), output_file)
+        input_hashes[job] = file_hash(job[0])
+        if not force and manifest.is_current(job[1], input_hashes[job], tex_template_hash):
+            results[job] = BatchResult(*job, time.perf_counter() - start, skipped=True)
+        else:
+            results[job] = None
+            jobs.append(job)
+
+    for result in _render_jobs(
+        jobs,
+        kind,
+        template_dir,
+        pre_escaped,
+        force,
+        workers,
+        fragments,
+        cache_dir,
+        input_cache_dir,
+    ):
+        job = (result.input_file, result.output_file)
+        results[job] = result
+        if result.ok:
+            manifest.record(
+                result.output_file, input_hashes[job], tex_template_hash, result.tex_hash
+            )
+
+    manifest.save()
+    return list(results.values())
+
+
+def _render_jobs(
+    jobs,
+    kind,
+    template_dir,
+    pre_escaped,
+    force,
+    workers,
+    fragments=False,
+    cache_dir=DEFAULT_CACHE_DIR,
+    input_cache_dir=DEFAULT_INPUT_CACHE_DIR,
+):
+    if not jobs:
+        return []
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+
+    if workers == 1:
+        _init_worker(kind, template_dir, pre_escaped, fragments, cache_dir, input_cache_dir)
+        return [_render_one(*job, force) for job in jobs]
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(kind, template_dir, pre_escaped, fragments, cache_dir, input_cache_dir),
+    ) as executor:
+        inputs, outputs = zip(*jobs)
+        return list(
+            executor.map(_render_one, inputs, outputs, [force] * len(jobs), chunksize=4)
+        )
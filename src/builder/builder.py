@@ -1,69 +1,213 @@
-import yaml
-import json
+import re
 from pathlib import Path
-from builder.template_env import get_tex_env
+from typing import Optional
+from builder.input_cache import DEFAULT_INPUT_CACHE_DIR, load_validated, parse_data
+from builder.manifest import BuildManifest, content_hash, file_hash, template_hash
+from builder.template_env import get_tex_env, escape_tree
 from models.schema import CurriculumVitae, CoverLetter
 
 
-def build_cv(input_file: str, output_file: str):
-    """Build CV from JSON/YAML data and LaTeX template
+def load_data(input_file: str) -> dict:
+    """Load CV or cover letter data from a JSON or YAML file
 
     Args:
-        input_file: Path to input JSON or YAML file containing CV data
-        output_file: Path to output LaTeX file
+        input_file: Path to input JSON or YAML file
+
+    Returns:
+        The parsed data as a dict
+    """
+    with open(input_file, "rb") as f:
+        return parse_data(f.read(), Path(input_file).suffix)
+
+
+PLACEHOLDER_PATTERN = re.compile("xXposition|xXcompany")
+
+
+def stream_with_placeholders(chunks, position: str, company: str):
+    """Replace xXposition/xXcompany in rendered chunks as they are generated
+
+    Jinja yields each interpolated value as its own chunk, so a placeholder
+    coming from the data never spans two chunks.
+    """
+    values = {"xXposition": position, "xXcompany": company}
+    for chunk in chunks:
+        yield PLACEHOLDER_PATTERN.sub(lambda match: values[match.group()], chunk)
+
+
+def template_context(data: dict, template) -> dict:
+    """Prepare validated data for rendering with the template's environment"""
+    if getattr(template.environment, "pre_escaped", False):
+        return escape_tree(data)
+    return data
+
+
+def render_cv(data: dict, template, validated: bool = False, fragments=None) -> str:
+    """Validate CV data and render it with an already loaded template
+
+    Args:
+        data: CV data matching the CurriculumVitae schema
+        template: Compiled cv.tex template
+        validated: data is already a CurriculumVitae model_dump(), e.g. from
+            load_validated, so validation is skipped
+        fragments: Optional FragmentCache; sections whose data matches an
+            earlier render are reused instead of rendered again
 
     Raises:
         ValidationError: If CV data does not match CurriculumVitae schema
     """
-    path = Path(input_file)
-    with open(input_file) as f:
-        if path.suffix.lower() == ".json":
-            data = json.load(f)
-        else:
-            data = yaml.safe_load(f)
+    if not validated:
+        data = CurriculumVitae(**data).model_dump()
+    context = template_context(data, template)
+    if fragments is not None:
+        return fragments.render(template, context)
+    return template.render(context)
+
 
-    cv = CurriculumVitae(**data)
+def render_cover_letter(data: dict, template, validated: bool = False) -> str:
+    """Validate cover letter data and render it with an already loaded template
 
-    env = get_tex_env()
-    template = env.get_template("cv.tex")
+    Position and company placeholders are replaced while the template renders.
+
+    Args:
+        data: Cover letter data matching the CoverLetter schema
+        template: Compiled cover-letter.tex template
+        validated: data is already a CoverLetter model_dump(), e.g. from
+            load_validated, so validation is skipped
+
+    Raises:
+        ValidationError: If cover letter data does not match CoverLetter schema
+    """
+    if not validated:
+        data = CoverLetter(**data).model_dump()
+    chunks = template.generate(template_context(data, template))
+    return "".join(stream_with_placeholders(chunks, data["position"], data["company"]))
 
-    rendered_tex = template.render(cv.model_dump())
+
+def write_if_changed(output_file: str, rendered_tex: str, force: bool = False):
+    """Write rendered_tex unless output_file already holds exactly that text
+
+    Leaving an unchanged file untouched keeps its mtime, so downstream steps
+    such as pdflatex in the Makefile are skipped too.
+
+    Returns:
+        (written, tex_hash) tuple
+    """
+    tex_hash = content_hash(rendered_tex)
+    if not force and file_hash(output_file) == tex_hash:
+        return False, tex_hash
 
     with open(output_file, "w") as f:
         f.write(rendered_tex)
+    return True, tex_hash
+
+
+def _build(
+    input_file,
+    output_file,
+    env,
+    template_name,
+    model_cls,
+    render,
+    force,
+    pre_escaped=False,
+    input_cache_dir=DEFAULT_INPUT_CACHE_DIR,
+) -> bool:
+    env = env or get_tex_env(pre_escaped=pre_escaped)
+    manifest = BuildManifest.for_output(output_file)
+    input_hash = file_hash(input_file)
+    tex_template_hash = template_hash(env, template_name)
+
+    if not force and manifest.is_current(output_file, input_hash, tex_template_hash):
+        return False
+
+    data = load_validated(input_file, model_cls, input_cache_dir)
+    rendered_tex = render(data, env.get_template(template_name), validated=True)
+    written, tex_hash = write_if_changed(output_file, rendered_tex, force)
+
+    manifest.record(output_file, input_hash, tex_template_hash, tex_hash)
+    manifest.save()
+    return written
+
+
+def build_cv(
+    input_file: str,
+    output_file: str,
+    env=None,
+    force: bool = False,
+    pre_escaped: bool = False,
+    input_cache_dir: Optional[str] = DEFAULT_INPUT_CACHE_DIR,
+) -> bool:
+    """Build CV from JSON/YAML data and LaTeX template
+
+    The build is skipped when the build manifest shows the input, template and
+    existing output are unchanged since the last build.
 
+    Args:
+        input_file: Path to input JSON or YAML file containing CV data
+        output_file: Path to output LaTeX file
+        env: Optional TexEnvironment to reuse; a new one is created if omitted
+        force: Render and write the output even if nothing changed
+        pre_escaped: Escape the data tree once before rendering; only used
+            when env is omitted
+        input_cache_dir: Directory for cached validated input data, or None
+            to always parse and validate
 
-def build_cover_letter(input_file: str, output_file: str):
+    Returns:
+        True if output_file was (re)written
+
+    Raises:
+        ValidationError: If CV data does not match CurriculumVitae schema
+    """
+    return _build(
+        input_file,
+        output_file,
+        env,
+        "cv.tex",
+        CurriculumVitae,
+        render_cv,
+        force,
+        pre_escaped,
+        input_cache_dir,
+    )
+
+
+def build_cover_letter(
+    input_file: str,
+    output_file: str,
+    env=None,
+    force: bool = False,
+    pre_escaped: bool = False,
+    input_cache_dir: Optional[str] = DEFAULT_INPUT_CACHE_DIR,
+) -> bool:
     """Build cover letter from JSON/YAML data and LaTeX template
 
     Cover letters require special handling for position and company placeholders
-    that are replaced after template rendering.
+    that are replaced while the template renders.
 
     Args:
         input_file: Path to input JSON or YAML file containing cover letter data
         output_file: Path to output LaTeX file
+        env: Optional TexEnvironment to reuse; a new one is created if omitted
+        force: Render and write the output even if nothing changed
+        pre_escaped: Escape the data tree once before rendering; only used
+            when env is omitted
+        input_cache_dir: Directory for cached validated input data, or None
+            to always parse and validate
+
+    Returns:
+        True if output_file was (re)written
 
     Raises:
         ValidationError: If cover letter data does not match CoverLetter schema
     """
-    path = Path(input_file)
-    with open(input_file) as f:
-        if path.suffix.lower() == ".json":
-            data = json.load(f)
-        else:
-            data = yaml.safe_load(f)
-
-    cover_letter = CoverLetter(**data)
-    cover_letter_data = cover_letter.model_dump()
-
-    env = get_tex_env()
-    template = env.get_template("cover-letter.tex")
-
-    rendered_tex = template.render(cover_letter_data)
-
-    final_tex = rendered_tex.replace("xXposition", cover_letter.position).replace(
-        "xXcompany", cover_letter.company
+    return _build(
+        input_file,
+        output_file,
+        env,
+        "cover-letter.tex",
+        CoverLetter,
+        render_cover_letter,
+        force,
+        pre_escaped,
+        input_cache_dir,
     )
-
-    with open(output_file, "w") as f:
-        f.write(final_tex)
@@ -1,5 +1,176 @@
 import argparse
-from builder.builder import build_cv, build_cover_letter
+import os
+import shlex
+import sys
+
+# Builder modules (jinja2, yaml, pydantic models) are imported only once the
+# arguments have been parsed, keeping --help and usage errors instant.
+
+
+def _add_build_arguments(parser):
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rebuild outputs even if inputs and template are unchanged",
+    )
+    parser.add_argument(
+        "--pdf",
+        action="store_true",
+        help="Compile the rendered LaTeX to PDF when the .tex changed or the PDF is missing",
+    )
+    parser.add_argument(
+        "--engine",
+        default=None,
+        help="TeX engine command for --pdf (default: pdflatex -interaction=nonstopmode -halt-on-error)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and rebuild whenever the input data or template changes",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Treat input_file as a directory or manifest of inputs and output_file as an output directory",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes for --batch and --pdf (default: CPU count)",
+    )
+    parser.add_argument(
+        "--pre-escape",
+        action="store_true",
+        help="Escape each input's data once up front instead of per interpolation",
+    )
+    parser.add_argument(
+        "--input-cache-dir",
+        default=None,
+        help="Directory for cached validated input data (default: .cache/inputs; '' disables it)",
+    )
+
+
+def _input_cache_dir(args):
+    from builder.input_cache import DEFAULT_INPUT_CACHE_DIR
+
+    if args.input_cache_dir is None:
+        return DEFAULT_INPUT_CACHE_DIR
+    return args.input_cache_dir or None
+
+
+def _report(written, output_file):
+    if not written:
+        print(f"{output_file} is up to date")
+
+
+def _compile(tex_files, args):
+    from builder.pdf import DEFAULT_ENGINE, compile_pdfs, needs_compile
+
+    stale = [
+        tex_file
+        for tex_file in tex_files
+        if args.force or needs_compile(tex_file, os.path.splitext(tex_file)[0] + ".pdf")
+    ]
+    engine = shlex.split(args.engine) if args.engine else DEFAULT_ENGINE
+    results = compile_pdfs(stale, engine=engine, workers=args.workers)
+
+    for result in results:
+        if result.ok:
+            print(f"📄 {result.pdf_file} ({result.runs} run(s), {result.seconds:.2f} s)")
+        else:
+            print(f"❌ {result.tex_file}: {result.error}")
+            print("\n".join(result.log.splitlines()[-20:]))
+
+    return all(result.ok for result in results)
+
+
+def _run_batch(kind, args):
+    from builder.batch import build_batch
+
+    results = build_batch(
+        args.input_file,
+        args.output_file,
+        kind=kind,
+        workers=args.workers,
+        pre_escaped=args.pre_escape,
+        force=args.force,
+        fragments=getattr(args, "fragments", False),
+        input_cache_dir=_input_cache_dir(args),
+    )
+
+    for result in results:
+        if result.skipped:
+            print(f"⏭️  {result.input_file} → {result.output_file} unchanged ({result.seconds * 1000:.1f} ms)")
+        elif result.ok:
+            print(f"✅ {result.input_file} → {result.output_file} ({result.seconds * 1000:.1f} ms)")
+        else:
+            print(f"❌ {result.input_file}: {result.error} ({result.seconds * 1000:.1f} ms)")
+
+    failures = sum(1 for result in results if not result.ok)
+    print(f"Rendered {len(results) - failures}/{len(results)} files")
+
+    compiled = True
+    if args.pdf:
+        compiled = _compile([result.output_file for result in results if result.ok], args)
+    if failures or not compiled:
+        sys.exit(1)
+
+
+def _run_watch(kind, args):
+    from builder.watch import WatchJob, watch
+
+    if args.batch:
+        from builder.batch import collect_inputs, output_paths
+
+        os.makedirs(args.output_file, exist_ok=True)
+        inputs = collect_inputs(args.input_file)
+        jobs = [
+            WatchJob(kind, str(input_file), output_file)
+            for input_file, output_file in zip(inputs, output_paths(inputs, args.output_file))
+        ]
+    else:
+        jobs = [WatchJob(kind, args.input_file, args.output_file)]
+
+    def on_rebuild(results):
+        for result in results:
+            if result.error:
+                print(f"❌ {result.job.input_file}: {result.error}")
+            elif result.written:
+                print(f"🔄 {result.job.input_file} → {result.job.output_file} ({result.seconds * 1000:.1f} ms)")
+        if args.pdf:
+            _compile([result.job.output_file for result in results if not result.error], args)
+
+    print(f"👀 Watching {len(jobs)} input(s) and templates/ for changes (Ctrl-C to stop)")
+    try:
+        watch(
+            jobs,
+            on_rebuild=on_rebuild,
+            pre_escaped=args.pre_escape,
+            input_cache_dir=_input_cache_dir(args),
+        )
+    except KeyboardInterrupt:
+        pass
+
+
+def _run_fan_out(args):
+    from builder.builder import load_data
+    from builder.fanout import FanOutSpec, fan_out_cover_letters
+    from builder.input_cache import load_validated
+    from builder.template_env import get_tex_env
+    from models.schema import CoverLetter
+
+    cover_letter = load_validated(args.input_file, CoverLetter, _input_cache_dir(args))
+    spec = FanOutSpec(**load_data(args.fan_out))
+    template = get_tex_env(pre_escaped=args.pre_escape).get_template("cover-letter.tex")
+
+    written = []
+    for output_file in fan_out_cover_letters(cover_letter, spec, template, args.output_file):
+        print(f"✅ {output_file}")
+        written.append(output_file)
+
+    if args.pdf and not _compile(written, args):
+        sys.exit(1)
 
 
 def main_cv():
@@ -7,9 +178,33 @@ def main_cv():
     parser = argparse.ArgumentParser(description="Build CV from JSON/YAML data and LaTeX template")
     parser.add_argument("input_file", help="Path to input JSON or YAML file")
     parser.add_argument("output_file", help="Path to output LaTeX file")
+    _add_build_arguments(parser)
+    parser.add_argument(
+        "--fragments",
+        action="store_true",
+        help="With --batch, reuse CV sections rendered for earlier inputs (helps when variants share large sections)",
+    )
 
     args = parser.parse_args()
-    build_cv(args.input_file, args.output_file)
+    if args.watch:
+        _run_watch("cv", args)
+    elif args.batch:
+        _run_batch("cv", args)
+    else:
+        from builder.builder import build_cv
+
+        _report(
+            build_cv(
+                args.input_file,
+                args.output_file,
+                force=args.force,
+                pre_escaped=args.pre_escape,
+                input_cache_dir=_input_cache_dir(args),
+            ),
+            args.output_file,
+        )
+        if args.pdf and not _compile([args.output_file], args):
+            sys.exit(1)
 
 
 def main_cover_letter():
@@ -17,9 +212,35 @@ def main_cover_letter():
     parser = argparse.ArgumentParser(description="Build cover letter from JSON/YAML data and LaTeX template")
     parser.add_argument("input_file", help="Path to input JSON or YAML file")
     parser.add_argument("output_file", help="Path to output LaTeX file")
+    _add_build_arguments(parser)
+    parser.add_argument(
+        "--fan-out",
+        metavar="SPEC",
+        help="JSON/YAML file of targets and paragraph variants; renders one letter per combination into output_file as a directory",
+    )
 
     args = parser.parse_args()
-    build_cover_letter(args.input_file, args.output_file)
+    if args.fan_out:
+        _run_fan_out(args)
+    elif args.watch:
+        _run_watch("cover-letter", args)
+    elif args.batch:
+        _run_batch("cover-letter", args)
+    else:
+        from builder.builder import build_cover_letter
+
+        _report(
+            build_cover_letter(
+                args.input_file,
+                args.output_file,
+                force=args.force,
+                pre_escaped=args.pre_escape,
+                input_cache_dir=_input_cache_dir(args),
+            ),
+            args.output_file,
+        )
+        if args.pdf and not _compile([args.output_file], args):
+            sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,95 @@
+"""Render one base cover letter for many (company, position) targets"""
+
+import itertools
+import os
+import re
+from typing import Dict, Iterator, List
+from pydantic import BaseModel, Field
+from builder.builder import template_context, stream_with_placeholders
+
+
+class LetterTarget(BaseModel):
+    company: str
+    position: str
+
+
+class FanOutSpec(BaseModel):
+    """Targets and paragraph variants to render from one base letter
+
+    Each variant maps a paragraph index to an index into
+    `alternate_paragraphs`; the empty variant is the base letter. Every target
+    is rendered once per variant.
+    """
+
+    targets: List[LetterTarget]
+    variants: List[Dict[int, int]] = Field(default_factory=lambda: [{}])
+
+
+def slugify(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+def apply_variant(cover_letter: dict, variant: Dict[int, int]) -> List[str]:
+    """Return the letter's paragraphs with the variant's alternates swapped in"""
+    paragraphs = list(cover_letter["paragraphs"])
+    alternates = cover_letter.get("alternate_paragraphs") or []
+    for slot, alternate in variant.items():
+        if not 0 <= slot < len(paragraphs) or not 0 <= alternate < len(alternates):
+            raise ValueError(
+                f"Variant {variant} does not fit {len(paragraphs)} paragraphs "
+                f"and {len(alternates)} alternate paragraphs"
+            )
+        paragraphs[slot] = alternates[alternate]
+    return paragraphs
+
+
+def fan_out_cover_letters(
+    cover_letter: dict, spec: FanOutSpec, template, output_dir: str
+) -> Iterator[str]:
+    """Lazily render every target × variant combination straight to files
+
+    Each letter is produced with the template's streaming generator and written
+    chunk by chunk; placeholders are substituted per chunk as it is generated.
+    Nothing is rendered until the returned iterator is consumed.
+
+    Args:
+        cover_letter: Validated CoverLetter model_dump() used as the base letter
+        spec: Targets and paragraph variants to render
+        template: Compiled cover-letter.tex template
+        output_dir: Directory that receives `<company>-<position>[-v<n>].tex`
+
+    Yields:
+        Path of each file once it has been written
+
+    Raises:
+        ValueError: If a variant does not fit the letter, or two targets
+            slugify to the same file name (say "Acme, Inc." and "Acme Inc");
+            both are checked before any file is written
+    """
+    variants = [(index, apply_variant(cover_letter, v)) for index, v in enumerate(spec.variants)]
+    targets = {}
+    for target in spec.targets:
+        name = f"{slugify(target.company)}-{slugify(target.position)}"
+        if name in targets:
+            raise ValueError(
+                f"Targets {targets[name].company} / {targets[name].position} and "
+                f"{target.company} / {target.position} would both be written to {name}.tex"
+            )
+        targets[name] = target
+    os.makedirs(output_dir, exist_ok=True)
+
+    for (name, target), (index, paragraphs) in itertools.product(targets.items(), variants):
+        context = {
+            **cover_letter,
+            "company": target.company,
+            "position": target.position,
+            "paragraphs": paragraphs,
+        }
+        if len(variants) > 1:
+            name += f"-v{index}"
+        output_file = os.path.join(output_dir, f"{name}.tex")
+
+        chunks = template.generate(template_context(context, template))
+        with open(output_file, "w") as f:
+            f.writelines(stream_with_placeholders(chunks, target.position, target.company))
+        yield output_file
@@ -0,0 +1,84 @@
+"""Reuse rendered template blocks across variants whose inputs did not change"""
+
+import pickle
+import weakref
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Dict, FrozenSet
+from jinja2 import meta, nodes
+
+
+class FragmentCache:
+    """In-memory LRU of rendered `(# block #)` fragments
+
+    A fragment is keyed by its block name and the hash of the context values
+    the block reads, as found by static analysis of the template. Entries
+    belong to a compiled template object, so a reloaded template never sees
+    fragments rendered by its previous version.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._fragments = weakref.WeakKeyDictionary()
+        self._dependencies = weakref.WeakKeyDictionary()
+
+    def block_dependencies(self, template) -> Dict[str, FrozenSet[str]]:
+        """Map each block of the template to the top-level names it reads"""
+        if template not in self._dependencies:
+            env = template.environment
+            source, _, _ = env.loader.get_source(env, template.name)
+            self._dependencies[template] = {
+                block.name: frozenset(
+                    meta.find_undeclared_variables(
+                        nodes.Template(block.body).set_environment(env)
+                    )
+                )
+                for block in env.parse(source).find_all(nodes.Block)
+            }
+        return self._dependencies[template]
+
+    def _get(self, template, key):
+        fragments = self._fragments.get(template)
+        if fragments is None or key not in fragments:
+            self.misses += 1
+            return None
+        self.hits += 1
+        fragments.move_to_end(key)
+        return fragments[key]
+
+    def _put(self, template, key, fragment: str) -> None:
+        fragments = self._fragments.setdefault(template, OrderedDict())
+        fragments[key] = fragment
+        if len(fragments) > self.maxsize:
+            fragments.popitem(last=False)
+
+    def render(self, template, context: dict) -> str:
+        """Render template with context, reusing cached block fragments
+
+        Blocks whose inputs hash to a cached entry are spliced in as-is; the
+        rest are rendered and cached. The result is byte-identical to
+        `template.render(context)`.
+        """
+        ctx = template.new_context(context)
+        digests = {}
+        for name, names in self.block_dependencies(template).items():
+            for var in names:
+                if var not in digests:
+                    digests[var] = _digest(context.get(var))
+            key = (name,) + tuple(digests[var] for var in sorted(names))
+
+            fragment = self._get(template, key)
+            if fragment is None:
+                fragment = "".join(ctx.blocks[name][0](ctx))
+                self._put(template, key, fragment)
+            ctx.blocks[name] = [lambda _, fragment=fragment: iter((fragment,))]
+
+        return "".join(template.root_render_func(ctx))
+
+
+def _digest(value) -> bytes:
+    # Equal model_dump() values pickle to equal bytes; the rare unequal
+    # pickling of equal values only costs a cache miss
+    return blake2b(pickle.dumps(value, protocol=5), digest_size=16).digest()
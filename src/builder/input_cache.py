@@ -0,0 +1,91 @@
+"""Cache of validated CV / cover letter data keyed by file content and schema"""
+
+import glob
+import json
+import os
+from functools import lru_cache
+from hashlib import sha256
+from typing import Optional, Type
+import yaml
+from pydantic import BaseModel
+
+DEFAULT_INPUT_CACHE_DIR = os.path.join(".cache", "inputs")
+
+
+@lru_cache(maxsize=None)
+def schema_version(model_cls: Type[BaseModel]) -> str:
+    """Hash of the model's JSON schema; changes whenever its fields change"""
+    schema = json.dumps(model_cls.model_json_schema(), sort_keys=True)
+    return sha256(f"{model_cls.__qualname__}\n{schema}".encode("utf-8")).hexdigest()
+
+
+def parse_data(raw: bytes, suffix: str) -> dict:
+    if suffix.lower() == ".json":
+        return json.loads(raw)
+    return yaml.safe_load(raw)
+
+
+def load_validated(
+    input_file: str,
+    model_cls: Type[BaseModel],
+    cache_dir: Optional[str] = DEFAULT_INPUT_CACHE_DIR,
+) -> dict:
+    """Load, validate and dump an input file, reusing a cached result if possible
+
+    The cache entry is the model_dump() of the validated model stored as compact
+    JSON, keyed by the sha256 of the file's bytes and the model's schema
+    version. A hit skips both YAML parsing and Pydantic validation. Entry
+    names start with a hash of the input's path and the schema, so writing a
+    new entry removes the ones left behind by earlier versions of the file.
+
+    Args:
+        input_file: Path to input JSON or YAML file
+        model_cls: Pydantic model the data must satisfy
+        cache_dir: Cache directory, or None to always parse and validate
+
+    Returns:
+        The validated data as produced by model_dump()
+
+    Raises:
+        ValidationError: If the data does not match model_cls
+    """
+    with open(input_file, "rb") as f:
+        raw = f.read()
+
+    cache_file = None
+    if cache_dir:
+        version = schema_version(model_cls)
+        prefix = sha256(f"{os.path.abspath(input_file)}\n{version}".encode("utf-8")).hexdigest()
+        key = sha256(raw + version.encode("utf-8")).hexdigest()
+        cache_file = os.path.join(cache_dir, f"{prefix[:16]}-{key}.json")
+        try:
+            with open(cache_file, "rb") as f:
+                return json.loads(f.read())
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+
+    data = model_cls(**parse_data(raw, os.path.splitext(input_file)[1])).model_dump()
+
+    if cache_file:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+            with open(tmp_file, "w") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_file, cache_file)
+            _remove_stale_entries(cache_file)
+        except OSError:
+            pass
+
+    return data
+
+
+def _remove_stale_entries(cache_file: str) -> None:
+    """Delete entries for the same input and schema but other file contents"""
+    prefix = os.path.basename(cache_file).split("-", 1)[0]
+    for stale in glob.glob(os.path.join(glob.escape(os.path.dirname(cache_file)), f"{prefix}-*.json")):
+        if stale != cache_file:
+            try:
+                os.remove(stale)
+            except FileNotFoundError:
+                pass
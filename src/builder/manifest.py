@@ -0,0 +1,87 @@
+"""Content-hash manifest used to skip rebuilding unchanged outputs"""
+
+import json
+import os
+import uuid
+from hashlib import sha256
+from typing import Optional
+from builder.template_env import environment_fingerprint
+
+MANIFEST_NAME = ".build-manifest.json"
+MANIFEST_VERSION = 1
+
+
+def content_hash(data) -> str:
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return sha256(data).hexdigest()
+
+
+def file_hash(path: str) -> Optional[str]:
+    """Return the sha256 of a file's bytes, or None if it does not exist"""
+    try:
+        with open(path, "rb") as f:
+            return content_hash(f.read())
+    except FileNotFoundError:
+        return None
+
+
+def template_hash(env, template_name: str) -> str:
+    """Hash a template's source together with the environment settings that
+    affect its output (delimiters, finalize/escaping mode)"""
+    source, _, _ = env.loader.get_source(env, template_name)
+    return content_hash(f"{environment_fingerprint(env)}\n{source}")
+
+
+class BuildManifest:
+    """Records, per output file, the hashes of the input, template and
+    rendered .tex that produced it
+
+    The manifest lives next to the outputs it describes, as
+    `.build-manifest.json`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}
+        try:
+            with open(path) as f:
+                stored = json.load(f)
+            if stored.get("version") == MANIFEST_VERSION:
+                self.entries = stored.get("outputs", {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+
+    @classmethod
+    def for_output(cls, output_file: str) -> "BuildManifest":
+        directory = os.path.dirname(os.path.abspath(output_file))
+        return cls(os.path.join(directory, MANIFEST_NAME))
+
+    def _key(self, output_file: str) -> str:
+        return os.path.basename(output_file)
+
+    def is_current(self, output_file: str, input_hash: str, template_hash: str) -> bool:
+        """True if output_file was built from these inputs and is untouched since"""
+        entry = self.entries.get(self._key(output_file))
+        return (
+            entry is not None
+            and entry["input"] == input_hash
+            and entry["template"] == template_hash
+            and entry["tex"] == file_hash(output_file)
+        )
+
+    def record(self, output_file: str, input_hash: str, template_hash: str, tex_hash: str) -> None:
+        self.entries[self._key(output_file)] = {
+            "input": input_hash,
+            "template": template_hash,
+            "tex": tex_hash,
+        }
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Unique per writer, so concurrent builds sharing an output directory
+        # never write into each other's temp file
+        tmp_path = f"{self.path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": MANIFEST_VERSION, "outputs": self.entries}, f, indent=2)
+        os.replace(tmp_path, self.path)
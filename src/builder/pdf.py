@@ -0,0 +1,146 @@
+"""PDF compilation stage: runs the TeX engine over rendered .tex files"""
+
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence
+from builder.manifest import file_hash
+
+DEFAULT_ENGINE = ("pdflatex", "-interaction=nonstopmode", "-halt-on-error")
+BUILD_DIR_NAME = ".build"
+MAX_RUNS = 3
+
+
+@dataclass
+class CompileResult:
+    """Outcome of compiling a single .tex file"""
+
+    tex_file: str
+    pdf_file: Optional[str]
+    runs: int
+    seconds: float
+    log: str = ""
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def needs_compile(tex_file: str, pdf_file: str) -> bool:
+    """True if pdf_file is missing or older than tex_file"""
+    try:
+        return os.path.getmtime(pdf_file) < os.path.getmtime(tex_file)
+    except FileNotFoundError:
+        return True
+
+
+def compile_pdf(
+    tex_file: str,
+    output_dir: Optional[str] = None,
+    engine: Sequence[str] = DEFAULT_ENGINE,
+    max_runs: int = MAX_RUNS,
+) -> CompileResult:
+    """Compile one .tex file to PDF in its own build directory
+
+    The engine runs in `<output_dir>/.build/<stem>/`, which is kept between
+    builds. The engine is rerun only while the .aux file keeps changing (cross
+    references, page counts), up to max_runs times. The finished PDF is copied
+    to output_dir.
+
+    Args:
+        tex_file: Path to the rendered .tex file
+        output_dir: Where the PDF is written; defaults to the .tex file's directory
+        engine: Command prefix for the TeX engine; `-output-directory=<dir>` and
+            the .tex path are appended
+        max_runs: Upper bound on engine runs
+
+    Returns:
+        CompileResult with the engine log of the last run
+    """
+    start = time.perf_counter()
+    tex_path = Path(tex_file).resolve()
+    output_dir = Path(output_dir) if output_dir else tex_path.parent
+    build_dir = output_dir / BUILD_DIR_NAME / tex_path.stem
+    build_dir.mkdir(parents=True, exist_ok=True)
+
+    aux_file = build_dir / f"{tex_path.stem}.aux"
+    log_file = build_dir / f"{tex_path.stem}.log"
+    command = [*engine, f"-output-directory={build_dir}", str(tex_path)]
+
+    runs = 0
+    log = ""
+    while runs < max_runs:
+        aux_before = file_hash(aux_file)
+        try:
+            completed = subprocess.run(
+                command,
+                cwd=tex_path.parent,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                errors="replace",
+            )
+        except OSError as e:
+            return CompileResult(
+                str(tex_file), None, runs, time.perf_counter() - start, error=str(e)
+            )
+        runs += 1
+        log = (
+            log_file.read_text(errors="replace") if log_file.exists() else completed.stdout
+        )
+
+        if completed.returncode != 0:
+            return CompileResult(
+                str(tex_file),
+                None,
+                runs,
+                time.perf_counter() - start,
+                log,
+                f"{engine[0]} exited with status {completed.returncode}",
+            )
+        if file_hash(aux_file) == aux_before:
+            break
+
+    built_pdf = build_dir / f"{tex_path.stem}.pdf"
+    if not built_pdf.exists():
+        return CompileResult(
+            str(tex_file), None, runs, time.perf_counter() - start, log, "No PDF was produced"
+        )
+
+    pdf_file = output_dir / built_pdf.name
+    shutil.copy2(built_pdf, pdf_file)
+    return CompileResult(str(tex_file), str(pdf_file), runs, time.perf_counter() - start, log)
+
+
+def compile_pdfs(
+    tex_files: Sequence[str],
+    output_dir: Optional[str] = None,
+    engine: Sequence[str] = DEFAULT_ENGINE,
+    workers: Optional[int] = None,
+    max_runs: int = MAX_RUNS,
+) -> List[CompileResult]:
+    """Compile many .tex files in a bounded pool of worker threads
+
+    Each job gets its own build directory, so jobs never share .aux or .log
+    files. A failing job is reported in its result and does not stop the rest.
+
+    Returns:
+        One CompileResult per .tex file, in input order
+    """
+    if not tex_files:
+        return []
+
+    workers = min(workers or os.cpu_count() or 1, len(tex_files))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(
+            executor.map(
+                lambda tex_file: compile_pdf(tex_file, output_dir, engine, max_runs),
+                tex_files,
+            )
+        )
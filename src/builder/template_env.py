@@ -1,25 +1,70 @@
-import re
-from jinja2 import Environment, FileSystemLoader
+import glob
+import os
+from functools import lru_cache
+from hashlib import sha1
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
+from jinja2.bccache import Bucket
 from markupsafe import Markup
 
+DEFAULT_CACHE_DIR = os.path.join(".cache", "templates")
+
+TEX_DELIMITERS = dict(
+    block_start_string=r"(#",
+    block_end_string="#)",
+    variable_start_string=r"((",
+    variable_end_string="))",
+    line_comment_prefix=r"%%",
+    comment_start_string=r"%(",
+    comment_end_string=")%",
+)
+
+TEX_REPLACEMENTS = {
+    "&": r"\&",
+    "%": r"\%",
+    "$": r"\$",
+    "#": r"\#",
+    "_": r"\_",
+    "{": r"\{",
+    "}": r"\}",
+    "~": r"\textasciitilde{}",
+    "^": r"\textasciicircum{}",
+    "\\": r"\textbackslash{}",
+}
+
+# Every special is a single character, so one translate() pass is equivalent
+# to the old regex alternation and never re-escapes its own output.
+_TEX_TABLE = str.maketrans(TEX_REPLACEMENTS)
+
+
+@lru_cache(maxsize=8192)
+def _escape_str(text):
+    return text.translate(_TEX_TABLE)
+
 
 def escape_tex(text):
     if not isinstance(text, str):
         return text
-    replacements = {
-        "&": r"\&",
-        "%": r"\%",
-        "$": r"\$",
-        "#": r"\#",
-        "_": r"\_",
-        "{": r"\{",
-        "}": r"\}",
-        "~": r"\textasciitilde{}",
-        "^": r"\textasciicircum{}",
-        "\\": r"\textbackslash{}",
-    }
-    pattern = re.compile("|".join(re.escape(key) for key in replacements.keys()))
-    return pattern.sub(lambda match: replacements[match.group()], text)
+    return _escape_str(text)
+
+
+def escape_tree(value):
+    """Escape every string in a model_dump() tree once, ahead of rendering
+
+    The result is meant for an environment created with
+    `get_tex_env(pre_escaped=True)`, which skips per-interpolation escaping.
+    Escaping is applied per character, so escaping the parts and then joining
+    or concatenating them in the template gives the same bytes as escaping
+    the joined result.
+    """
+    if isinstance(value, Markup):
+        return value
+    if isinstance(value, str):
+        return _escape_str(value)
+    if isinstance(value, dict):
+        return {key: escape_tree(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [escape_tree(item) for item in value]
+    return value
 
 
 def finalize(value):
@@ -30,23 +75,109 @@ def finalize(value):
     return "" if value is None else value
 
 
+def finalize_pre_escaped(value):
+    return "" if value is None else value
+
+
+def escape_tex_pre_escaped(value):
+    """escape_tex filter for pre-escaped contexts, whose strings are already escaped"""
+    return value
+
+
 class TexEnvironment(Environment):
-    def __init__(self, *args, **kwargs):
-        kwargs.setdefault("finalize", finalize)
+    def __init__(self, *args, pre_escaped=False, **kwargs):
+        kwargs.setdefault("finalize", finalize_pre_escaped if pre_escaped else finalize)
         kwargs.setdefault("autoescape", False)
         super().__init__(*args, **kwargs)
+        self.pre_escaped = pre_escaped
+
+
+class TexBytecodeCache(FileSystemBytecodeCache):
+    """On-disk cache of compiled templates shared across processes
+
+    Cache entries are keyed by `<template id>-<content hash>`, where the
+    template id covers the template's name and path and the environment's
+    lexer and finalize settings, so editing a template or changing the
+    delimiters never loads stale code. Storing a template's new code removes
+    the entries for its earlier contents.
+    """
+
+    def get_bucket(self, environment, name, filename, source):
+        checksum = self.get_source_checksum(source)
+        template_id = sha1(
+            "|".join([name, filename or "", environment_fingerprint(environment)]).encode("utf-8")
+        ).hexdigest()[:16]
+        bucket = Bucket(environment, f"{template_id}-{checksum}", checksum)
+        self.load_bytecode(bucket)
+        return bucket
+
+    def dump_bytecode(self, bucket):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            super().dump_bytecode(bucket)
+            self._remove_stale_entries(bucket)
+        except OSError:
+            # A read-only cache directory only costs us the compile time
+            pass
+
+    def _remove_stale_entries(self, bucket):
+        """Delete this template's other entries, and any from before template ids"""
+        current = self._get_cache_filename(bucket)
+        template_id = bucket.key.split("-", 1)[0]
+        directory = glob.escape(self.directory)
+        stale_entries = glob.glob(os.path.join(directory, self.pattern % f"{template_id}-*"))
+        stale_entries += [
+            path
+            for path in glob.glob(os.path.join(directory, self.pattern % "*"))
+            if "-" not in os.path.basename(path)
+        ]
+        for stale in stale_entries:
+            if stale != current:
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    pass
+
+
+def environment_fingerprint(environment) -> str:
+    settings = [
+        environment.block_start_string,
+        environment.block_end_string,
+        environment.variable_start_string,
+        environment.variable_end_string,
+        environment.comment_start_string,
+        environment.comment_end_string,
+        environment.line_statement_prefix,
+        environment.line_comment_prefix,
+        environment.trim_blocks,
+        environment.lstrip_blocks,
+        environment.newline_sequence,
+        environment.keep_trailing_newline,
+    ]
+    if environment.finalize is not None:
+        settings.append(
+            f"{environment.finalize.__module__}.{environment.finalize.__qualname__}"
+        )
+    return sha1(repr(settings).encode("utf-8")).hexdigest()
+
 
+def get_tex_env(template_dir="templates", cache_dir=DEFAULT_CACHE_DIR, pre_escaped=False):
+    """Create the LaTeX-friendly Jinja2 environment
 
-def get_tex_env(template_dir="templates"):
+    Args:
+        template_dir: Directory containing the LaTeX templates
+        cache_dir: Directory for the persistent compiled-template cache, or
+            None to compile templates in memory only
+        pre_escaped: Render contexts already passed through escape_tree
+            instead of escaping each interpolated string. Only valid for
+            templates whose string literals contain no TeX specials. An
+            explicit `|escape_tex` then passes values through unchanged.
+    """
     env = TexEnvironment(
         loader=FileSystemLoader(template_dir),
-        block_start_string=r"(#",
-        block_end_string="#)",
-        variable_start_string=r"((",
-        variable_end_string="))",
-        line_comment_prefix=r"%%",
-        comment_start_string=r"%(",
-        comment_end_string=")%",
+        pre_escaped=pre_escaped,
+        bytecode_cache=TexBytecodeCache(cache_dir) if cache_dir else None,
+        **TEX_DELIMITERS,
     )
-    env.filters["escape_tex"] = escape_tex
+    env.filters["escape_tex"] = escape_tex_pre_escaped if pre_escaped else escape_tex
     return env
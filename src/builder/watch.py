@@ -0,0 +1,140 @@
+"""Watch mode: keep one warm process and rebuild outputs when their inputs change"""
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Optional
+from watchfiles import watch as watch_paths
+from builder.batch import RENDERERS
+from builder.builder import build_cv, build_cover_letter
+from builder.input_cache import DEFAULT_INPUT_CACHE_DIR
+from builder.template_env import DEFAULT_CACHE_DIR, get_tex_env
+
+BUILDERS = {
+    "cv": build_cv,
+    "cover-letter": build_cover_letter,
+}
+
+
+@dataclass(frozen=True)
+class WatchJob:
+    """One input → output pair kept up to date by watch()"""
+
+    kind: str
+    input_file: str
+    output_file: str
+
+
+@dataclass
+class RebuildResult:
+    job: WatchJob
+    written: bool
+    seconds: float
+    error: Optional[str] = None
+
+
+def affected_jobs(
+    changed_paths: Iterable[str], jobs: List[WatchJob], template_dir: str
+) -> List[WatchJob]:
+    """Select the jobs whose output depends on any of the changed paths
+
+    An input file affects only its own job, a document template affects every
+    job of that kind, and any other file in the template directory (an
+    included partial, say) affects all jobs.
+    """
+    changed = {os.path.abspath(path) for path in changed_paths}
+    template_dir = os.path.abspath(template_dir)
+    templates = {
+        kind: os.path.join(template_dir, template_name)
+        for kind, (template_name, _) in RENDERERS.items()
+    }
+
+    other_templates = {
+        path
+        for path in changed
+        if path.startswith(template_dir + os.sep) and path not in templates.values()
+    }
+    if other_templates:
+        return list(jobs)
+
+    return [
+        job
+        for job in jobs
+        if os.path.abspath(job.input_file) in changed or templates[job.kind] in changed
+    ]
+
+
+def rebuild(
+    jobs: List[WatchJob],
+    env,
+    force: bool = False,
+    input_cache_dir: Optional[str] = DEFAULT_INPUT_CACHE_DIR,
+) -> List[RebuildResult]:
+    """Rebuild jobs with an already warm environment, recording errors per job"""
+    results = []
+    for job in jobs:
+        start = time.perf_counter()
+        try:
+            written = BUILDERS[job.kind](
+                job.input_file,
+                job.output_file,
+                env=env,
+                force=force,
+                input_cache_dir=input_cache_dir,
+            )
+        except Exception as e:
+            results.append(
+                RebuildResult(job, False, time.perf_counter() - start, f"{type(e).__name__}: {e}")
+            )
+            continue
+        results.append(RebuildResult(job, written, time.perf_counter() - start))
+    return results
+
+
+def watch(
+    jobs: List[WatchJob],
+    template_dir: str = "templates",
+    on_rebuild: Optional[Callable[[List[RebuildResult]], None]] = None,
+    stop_event=None,
+    pre_escaped: bool = False,
+    cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+    input_cache_dir: Optional[str] = DEFAULT_INPUT_CACHE_DIR,
+) -> None:
+    """Build all jobs once, then rebuild affected jobs whenever a file changes
+
+    Uses inotify (or the platform equivalent) through watchfiles. The parent
+    directories of the inputs are watched rather than the files themselves so
+    that editors which save by renaming a temporary file are picked up.
+
+    Args:
+        jobs: Input/output pairs to keep up to date
+        template_dir: Directory containing the LaTeX templates
+        on_rebuild: Called with the results of every rebuild, including the first
+        stop_event: Optional threading.Event that ends the watch loop when set
+        pre_escaped: Escape each input's data tree once before rendering
+        cache_dir: Directory for the compiled-template cache, or None to
+            disable it
+        input_cache_dir: Directory for cached validated input data, or None
+            to always parse and validate
+    """
+    env = get_tex_env(template_dir, cache_dir=cache_dir, pre_escaped=pre_escaped)
+    on_rebuild = on_rebuild or (lambda results: None)
+    on_rebuild(rebuild(jobs, env, input_cache_dir=input_cache_dir))
+
+    watched_files = {os.path.abspath(job.input_file) for job in jobs}
+    watched_dirs = {os.path.dirname(path) for path in watched_files}
+    watched_dirs.add(os.path.abspath(template_dir))
+
+    def is_relevant(change, path):
+        return path in watched_files or path.startswith(os.path.abspath(template_dir) + os.sep)
+
+    for changes in watch_paths(
+        *sorted(watched_dirs),
+        watch_filter=is_relevant,
+        debounce=200,
+        recursive=False,
+        stop_event=stop_event,
+    ):
+        affected = affected_jobs((path for _, path in changes), jobs, template_dir)
+        if affected:
+            on_rebuild(rebuild(affected, env, input_cache_dir=input_cache_dir))
@@ -1,4 +1,18 @@
-from .crew import CvOptimization
-from .models import JobPosting, CvTransformationPlan
+# Exports are resolved lazily: importing optimizer.crew pulls in crewai,
+# langchain and the LLM clients, which takes seconds, and submodules such as
+# optimizer.config or optimizer.cli must not pay for that on import.
+_EXPORTS = {
+    "CvOptimization": "optimizer.crew",
+    "JobPosting": "optimizer.models",
+    "CvTransformationPlan": "optimizer.models",
+}
 
 __all__ = ["CvOptimization", "JobPosting", "CvTransformationPlan"]
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        import importlib
+
+        return getattr(importlib.import_module(_EXPORTS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
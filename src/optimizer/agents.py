@@ -44,10 +44,14 @@ class CustomAgents:
             knowledge_base_abspath=self.config.knowledge_base_abspath,
             vector_db_abspath=self.config.vector_db_abspath,
             force_rebuild=False,
+            embedding_store_abspath=self.config.embedding_store_abspath,
         )
 
     def get_knowledge_base_tool(self) -> KnowledgeBaseTool:
-        return KnowledgeBaseTool(vector_db_path=self.config.vector_db_abspath)
+        return KnowledgeBaseTool(
+            vector_db_path=self.config.vector_db_abspath,
+            embedding_cache_path=self.config.embedding_cache_abspath,
+        )
 
     def get_directory_search_tool(self) -> DirectorySearchTool:
         return DirectorySearchTool(
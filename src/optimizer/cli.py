@@ -1,19 +1,21 @@
 import argparse
 import json
-import jsonschema
 import logging
 import os
 import warnings
 import yaml
-from optimizer.crew import (
-    CvOptimization,
-    CvAnalysis,
-    JobAnalysis,
-    CvAlignment,
-    CvTransformation,
-)
 from optimizer.logging.console_capture import capture_console_output
 
+# optimizer.crew (crewai, langchain, chroma, LLM clients) is imported inside the
+# kickoff functions, after config validation, so --help and bad configs fail fast.
+
+
+def validate_config(config, schema):
+    """Validate config against a JSON schema (jsonschema is imported on first use)"""
+    import jsonschema
+
+    jsonschema.validate(instance=config, schema=schema)
+
 
 def raise_exception_if_files_missing(file_paths):
     """Raise FileNotFoundError if any of the specified file paths do not exist."""
@@ -121,7 +123,9 @@ def kickoff_cv_optimization(config):
         "required": ["inputs"],
     }
 
-    jsonschema.validate(instance=config, schema=schema)
+    validate_config(config, schema)
+
+    from optimizer.crew import CvOptimization
 
     CvOptimization().crew().kickoff(inputs=config.get("inputs"))
 
@@ -142,7 +146,9 @@ def kickoff_cv_analysis(config):
         "required": ["inputs"],
     }
 
-    jsonschema.validate(instance=config, schema=schema)
+    validate_config(config, schema)
+
+    from optimizer.crew import CvAnalysis
 
     CvAnalysis().crew().kickoff(inputs=config.get("inputs"))
 
@@ -163,7 +169,9 @@ def kickoff_job_analysis(config):
         "required": ["inputs"],
     }
 
-    jsonschema.validate(instance=config, schema=schema)
+    validate_config(config, schema)
+
+    from optimizer.crew import JobAnalysis
 
     JobAnalysis().crew().kickoff(inputs=config.get("inputs"))
 
@@ -184,13 +192,15 @@ def kickoff_cv_alignment(config):
         "required": ["inputs"],
     }
 
-    jsonschema.validate(instance=config, schema=schema)
+    validate_config(config, schema)
 
     output_directory = config.get("inputs", {}).get("output_directory", "output")
     raise_exception_if_files_missing(
         [os.path.join(output_directory, "job_posting.json")]
     )
 
+    from optimizer.crew import CvAlignment
+
     CvAlignment().crew().kickoff(inputs=config.get("inputs"))
 
 
@@ -210,7 +220,7 @@ def kickoff_cv_transformation(config):
         "required": ["inputs"],
     }
 
-    jsonschema.validate(instance=config, schema=schema)
+    validate_config(config, schema)
 
     output_directory = config.get("inputs", {}).get("output_directory", "output")
     raise_exception_if_files_missing(
@@ -220,6 +230,8 @@ def kickoff_cv_transformation(config):
         ]
     )
 
+    from optimizer.crew import CvTransformation
+
     CvTransformation().crew().kickoff(inputs=config.get("inputs"))
 
 
@@ -2,6 +2,7 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field, field_validator
+from typing import Literal
 import yaml
 
 
@@ -14,10 +15,26 @@ class AgentSettings(BaseModel):
 class RagSettings(BaseModel):
     """Configuration for RAG (Retrieval-Augmented Generation)"""
     embedding_model: str = Field(min_length=1)
+    vector_store: Literal["chroma", "numpy"] = Field(
+        default="chroma", description="chroma, or numpy for a memory-mapped brute-force index"
+    )
+    embedding_backend: Literal["openai", "local"] = Field(
+        default="openai", description="openai, or local for offline hashed n-gram vectors"
+    )
     collection_name: str = Field(min_length=1)
     num_results: int = Field(gt=0, description="Number of results to retrieve")
+    hybrid_search: bool = Field(default=True, description="Fuse BM25 and vector rankings")
+    context_token_budget: int = Field(
+        default=1500, ge=0, description="Token budget for packed tool results (0 disables)"
+    )
     chunk_size: int = Field(ge=100, description="Chunk size for text splitting")
     chunk_overlap: int = Field(ge=0, description="Overlap between chunks")
+    embedding_batch_size: int = Field(default=64, gt=0, description="Chunks per embedding request")
+    embedding_concurrency: int = Field(default=4, gt=0, description="Embedding requests in flight")
+    embedding_max_retries: int = Field(default=6, ge=0, description="Retries per request after a 429")
+    split_workers: int = Field(
+        default=1, ge=1, description="Processes splitting files while indexing (1 = in-process)"
+    )
 
     @field_validator('chunk_overlap')
     @classmethod
@@ -31,6 +48,8 @@ class PathSettings(BaseModel):
     """Configuration for file paths"""
     knowledge_base: str
     vector_db: str
+    embedding_cache: str = ".cache/embeddings.sqlite3"
+    embedding_store: str = ".cache/chunk-embeddings.sqlite3"
 
 
 class Settings(BaseModel):
@@ -138,6 +157,14 @@ class Config:
     def vector_db_abspath(self) -> str:
         return os.path.abspath(self._settings.paths.vector_db)
 
+    @property
+    def embedding_cache_abspath(self) -> str:
+        return os.path.abspath(self._settings.paths.embedding_cache)
+
+    @property
+    def embedding_store_abspath(self) -> str:
+        return os.path.abspath(self._settings.paths.embedding_store)
+
 
 def get_config() -> Config:
     return Config()
@@ -150,8 +177,16 @@ def get_rag_config() -> dict:
 
     return {
         "embedding_model": settings.rag.embedding_model,
+        "embedding_backend": settings.rag.embedding_backend,
+        "vector_store": settings.rag.vector_store,
         "collection_name": settings.rag.collection_name,
         "num_results": settings.rag.num_results,
+        "hybrid_search": settings.rag.hybrid_search,
+        "context_token_budget": settings.rag.context_token_budget,
         "chunk_size": settings.rag.chunk_size,
         "chunk_overlap": settings.rag.chunk_overlap,
+        "embedding_batch_size": settings.rag.embedding_batch_size,
+        "embedding_concurrency": settings.rag.embedding_concurrency,
+        "embedding_max_retries": settings.rag.embedding_max_retries,
+        "split_workers": settings.rag.split_workers,
     }
@@ -1,11 +1,37 @@
+import itertools
+import json
 import os
+import shutil
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import sha256
 from pathlib import Path
-from optimizer.utils.vector_utils import is_valid_chroma_vector_db, get_chroma_vector_db
+from typing import Iterator, List, Tuple
+from optimizer.utils.vector_utils import (
+    INDEX_MANIFEST_NAME,
+    VECTOR_STORES,
+    build_lock,
+    delete_vector_db,
+    is_valid_vector_db,
+    get_shared_vector_db,
+    get_chunk_embedding_store,
+    publish_snapshot,
+    read_index_manifest,
+    staging_path,
+)
+from optimizer.utils.embedding_cache import CachedEmbeddings
+from optimizer.utils.batched_embeddings import BatchedEmbeddings
+from optimizer.utils.embedding_backends import create_embeddings, embedding_model_id
+from optimizer.utils.bm25 import BM25Index, bm25_index_path
 from optimizer.config.settings import get_rag_config
-from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.document_loaders import DirectoryLoader, TextLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from optimizer.utils.markdown_splitter import split_file
+
+# Bumped when the files stored next to the collection change; forces a rebuild
+INDEX_FORMAT = 5
+# Longest stretch of indexing a hard kill can lose; BM25 and manifest saves
+# rewrite the whole file, so they are not done after every group
+CHECKPOINT_SECONDS = 30.0
 
 
 class KnowledgeBaseEmbedder:
@@ -14,28 +40,83 @@ class KnowledgeBaseEmbedder:
         knowledge_base_abspath: str,
         vector_db_abspath: str,
         force_rebuild: bool = False,
+        embedding_store_abspath: str = None,
     ):
         self.knowledge_base_path = knowledge_base_abspath
         self.vector_db_path = vector_db_abspath
         self.force_rebuild = force_rebuild
+        self.embedding_store_path = embedding_store_abspath
+        # Where the build writes; a staging directory while build_if_needed runs
+        self.build_path = vector_db_abspath
 
         rag_config = get_rag_config()
         self.embedding_model = rag_config["embedding_model"]
+        self.embedding_backend = rag_config["embedding_backend"]
+        self.vector_store = rag_config["vector_store"]
         self.chunk_size = rag_config["chunk_size"]
         self.chunk_overlap = rag_config["chunk_overlap"]
         self.collection_name = rag_config["collection_name"]
+        self.embedding_batch_size = rag_config["embedding_batch_size"]
+        self.embedding_concurrency = rag_config["embedding_concurrency"]
+        self.embedding_max_retries = rag_config["embedding_max_retries"]
+        self.split_workers = rag_config["split_workers"]
 
     def build_if_needed(self) -> None:
-        if self.force_rebuild or not is_valid_chroma_vector_db(self.vector_db_path):
-            if self.force_rebuild and is_valid_chroma_vector_db(self.vector_db_path):
-                # Delete existing DB to avoid ChromaDB conflicts
-                from optimizer.utils.vector_utils import delete_vector_db
+        """Bring the vector DB in line with the knowledge base
+
+        Rebuilds from scratch when forced, when there is no DB or no index
+        manifest yet, or when the chunking or embedding settings changed.
+        Otherwise only added, modified and removed files are re-indexed.
+
+        Builds run in a staging directory, started from a copy of the live DB
+        for incremental updates, and are published with an atomic swap, so
+        readers never see a half-built collection. One build runs at a time
+        across processes. If another process is already building, a live DB
+        is used as it is rather than waited for. A staging directory left by
+        an interrupted build is resumed.
+        """
+        live_db = is_valid_vector_db(
+            self.vector_db_path, self.vector_store, self.collection_name
+        )
+        with build_lock(self.vector_db_path, wait=self.force_rebuild or not live_db) as locked:
+            if not locked:
+                print("⏳ Another process is rebuilding the vector DB; using the current one")
+                return
+
+            staging = staging_path(self.vector_db_path)
+            if self.force_rebuild:
+                shutil.rmtree(staging, ignore_errors=True)
+            if os.path.isdir(staging):
+                print(f"♻️ Resuming the interrupted build in {staging}")
+            else:
+                manifest = self._load_manifest(self.vector_db_path)
+                if manifest is not None:
+                    changed, removed = changed_files(manifest["files"], self._scan_knowledge_base())
+                    if not changed and not removed:
+                        print("📦 Vector DB is up to date at:", self.vector_db_path)
+                        return
+                    shutil.copytree(os.path.realpath(self.vector_db_path), staging)
 
-                delete_vector_db(self.vector_db_path)
-            print("🛠️ Building or rebuilding vector DB from knowledge base...")
-            self._build_vector_db()
-        else:
-            print("📦 Using existing vector DB at:", self.vector_db_path)
+            self.build_path = staging
+            try:
+                self._build_or_update()
+            finally:
+                self.build_path = self.vector_db_path
+            publish_snapshot(staging, self.vector_db_path)
+            print(f"🔀 Published the new vector DB at {self.vector_db_path}")
+
+    def _build_or_update(self) -> None:
+        """Update the DB at build_path in place, or rebuild it if it can't be"""
+        manifest = self._load_manifest(self.build_path)
+        if manifest is not None:
+            self._update_vector_db(manifest["files"])
+            return
+        if is_valid_vector_db(self.build_path, self.vector_store, self.collection_name):
+            print("⚙️ Index settings or format changed since the last build")
+            # Delete existing DB to avoid conflicts with stale collections
+            delete_vector_db(self.build_path)
+        print("🛠️ Building or rebuilding vector DB from knowledge base...")
+        self._build_vector_db()
 
     def _build_vector_db(self) -> None:
         if not os.path.exists(self.knowledge_base_path):
@@ -44,47 +125,250 @@ class KnowledgeBaseEmbedder:
             )
 
         print(f"📂 Loading documents from {self.knowledge_base_path}")
+        files = self._scan_knowledge_base()
 
-        # Load all markdown and text files from the knowledge base
-        loader = DirectoryLoader(
-            self.knowledge_base_path,
-            glob="**/*.md",
-            loader_cls=TextLoader,
-            show_progress=True,
-            use_multithreading=True
-        )
-        documents = loader.load()
+        print(f"📄 Found {len(files)} documents")
+        print(f"💾 Creating vector database at {self.build_path}")
+        vectorstore = self._open_vector_db()
+        chunk_count = self._index_files(vectorstore, BM25Index(), files, files, {})
 
-        print(f"📄 Loaded {len(documents)} documents")
+        store = vectorstore.embeddings.document_cache
+        if store is not None:
+            print(f"♻️  Reused {store.hits} stored chunk embeddings, embedded {store.misses}")
+        print(f"✅ Vector database created successfully ({chunk_count} chunks)")
 
-        # Split documents into chunks
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=self.chunk_size,
-            chunk_overlap=self.chunk_overlap,
-            length_function=len,
+    def _update_vector_db(self, indexed: dict) -> None:
+        """Re-index only the files whose content changed since the manifest"""
+        files = self._scan_knowledge_base()
+        changed, removed = changed_files(indexed, files)
+        if not changed and not removed:
+            return
+
+        print(
+            f"🔄 Re-indexing {len(changed)} changed and {len(removed)} removed "
+            f"of {len(files)} documents"
         )
-        chunks = text_splitter.split_documents(documents)
+        vectorstore = self._open_vector_db()
+
+        stale_ids = [
+            chunk_id
+            for relpath in list(changed) + removed
+            for chunk_id in indexed.get(relpath, {}).get("ids", [])
+        ]
+        bm25 = BM25Index.load(bm25_index_path(self.build_path))
+        if stale_ids:
+            vectorstore.delete(ids=stale_ids)
+            bm25.remove(stale_ids)
 
-        print(f"✂️  Split into {len(chunks)} chunks")
+        # Changed files are only recorded again once re-added, so an
+        # interrupted run picks them up next time
+        ids_by_file = {
+            relpath: indexed[relpath]["ids"] for relpath in files if relpath not in changed
+        }
+        chunk_count = self._index_files(vectorstore, bm25, changed, files, ids_by_file)
 
-        # Create embeddings and vector store
-        embedding_function = OpenAIEmbeddings(model=self.embedding_model)
+        print(f"✅ Re-embedded {chunk_count} chunks, deleted {len(stale_ids)}")
 
-        print(f"💾 Creating vector database at {self.vector_db_path}")
-        Chroma.from_documents(
-            documents=chunks,
-            embedding=embedding_function,
-            persist_directory=self.vector_db_path,
-            collection_name=self.collection_name
+    def _index_files(
+        self,
+        vectorstore,
+        bm25: BM25Index,
+        pending: dict,
+        files: dict,
+        ids_by_file: dict,
+    ) -> int:
+        """Stream pending files through split → embed → upsert
+
+        Files are split in worker processes and upserted in groups of about
+        one round of concurrent embedding requests, into both the collection
+        and the BM25 index. The BM25 index and manifest are checkpointed every
+        CHECKPOINT_SECONDS and when indexing ends or is interrupted, so a
+        resumed build only redoes the files indexed since the last checkpoint.
+        Returns the number of chunks upserted.
+        """
+        group_size = self.embedding_batch_size * self.embedding_concurrency
+        chunk_count = 0
+        done = 0
+        start = checkpointed = time.perf_counter()
+
+        split = split_files(pending, self.chunk_size, self.chunk_overlap, self.split_workers)
+        try:
+            for group in group_files(split, group_size):
+                chunks, ids, group_ids = [], [], {}
+                for relpath, file_chunks in group:
+                    group_ids[relpath] = chunk_ids(relpath, len(file_chunks))
+                    chunks.extend(file_chunks)
+                    ids.extend(group_ids[relpath])
+                if chunks:
+                    vectorstore.add_documents(chunks, ids=ids)
+                bm25.add(ids, chunks)
+                ids_by_file.update(group_ids)
+
+                done += len(group)
+                chunk_count += len(chunks)
+                seconds = time.perf_counter() - start
+                print(
+                    f"📥 Indexed {done}/{len(pending)} documents, {chunk_count} chunks "
+                    f"({chunk_count / seconds:.1f} chunks/s)"
+                )
+                if time.perf_counter() - checkpointed >= CHECKPOINT_SECONDS:
+                    self._checkpoint(bm25, files, ids_by_file)
+                    checkpointed = time.perf_counter()
+        finally:
+            self._checkpoint(bm25, files, ids_by_file)
+        return chunk_count
+
+    def _checkpoint(self, bm25: BM25Index, files: dict, ids_by_file: dict) -> None:
+        """Save the BM25 index, then the manifest of the files it covers"""
+        bm25.save(bm25_index_path(self.build_path))
+        self._save_manifest(files, ids_by_file)
+
+    def _open_vector_db(self):
+        return VECTOR_STORES[self.vector_store](
+            persist_directory=self.build_path,
+            embedding_function=self._embedding_function(),
+            collection_name=self.collection_name,
         )
 
-        print("✅ Vector database created successfully")
+    def _embedding_function(self) -> CachedEmbeddings:
+        """Embeddings for indexing: stored chunks first, then batched API calls"""
+        return CachedEmbeddings(
+            BatchedEmbeddings(
+                # Retries are done by BatchedEmbeddings so every worker backs off together
+                create_embeddings(self.embedding_backend, self.embedding_model, max_retries=0),
+                batch_size=self.embedding_batch_size,
+                concurrency=self.embedding_concurrency,
+                max_retries=self.embedding_max_retries,
+            ),
+            embedding_model_id(self.embedding_backend, self.embedding_model),
+            document_cache=get_chunk_embedding_store(self.embedding_store_path),
+        )
 
-    def get_vector_db(self) -> Chroma:
-        return get_chroma_vector_db(
+    def _index_settings(self) -> dict:
+        return {
+            "index_format": INDEX_FORMAT,
+            "vector_store": self.vector_store,
+            "embedding_backend": self.embedding_backend,
+            "embedding_model": self.embedding_model,
+            "collection_name": self.collection_name,
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+        }
+
+    def _scan_knowledge_base(self) -> dict:
+        """Map each markdown file's relative path to (absolute path, content hash)"""
+        root = Path(self.knowledge_base_path)
+        files = {}
+        for path in sorted(root.glob("**/*.md")):
+            if path.is_file():
+                files[path.relative_to(root).as_posix()] = (
+                    str(path),
+                    sha256(path.read_bytes()).hexdigest(),
+                )
+        return files
+
+    def _load_manifest(self, vector_db_abspath: str):
+        """The DB's manifest, or None if the DB can't be updated incrementally"""
+        if self.force_rebuild or not is_valid_vector_db(
+            vector_db_abspath, self.vector_store, self.collection_name
+        ):
+            return None
+        manifest = read_index_manifest(vector_db_abspath)
+        if manifest is None or manifest.get("settings") != self._index_settings():
+            return None
+        return manifest
+
+    def _save_manifest(self, files: dict, ids_by_file: dict) -> None:
+        """Record path → content hash → chunk IDs of the files indexed so far"""
+        manifest = {
+            "settings": self._index_settings(),
+            "files": {
+                relpath: {"hash": files[relpath][1], "ids": ids}
+                for relpath, ids in ids_by_file.items()
+            },
+        }
+        manifest_path = os.path.join(self.build_path, INDEX_MANIFEST_NAME)
+        tmp_file = f"{manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_file, manifest_path)
+
+    def get_vector_db(self):
+        return get_shared_vector_db(
             vector_db_abspath=self.vector_db_path,
             collection_name=self.collection_name,
+            embedding_model=self.embedding_model,
+            embedding_store_path=self.embedding_store_path,
+            embedding_backend=self.embedding_backend,
+            vector_store=self.vector_store,
         )
 
     def get_vector_db_abspath(self) -> str:
         return self.vector_db_path
+
+
+def changed_files(indexed: dict, files: dict) -> Tuple[dict, list]:
+    """Files added or modified since the manifest, and manifest files since removed"""
+    changed = {
+        relpath: entry
+        for relpath, entry in files.items()
+        if indexed.get(relpath, {}).get("hash") != entry[1]
+    }
+    removed = [relpath for relpath in indexed if relpath not in files]
+    return changed, removed
+
+
+def chunk_ids(relpath: str, count: int) -> list:
+    """Stable IDs for the chunks of one knowledge base file"""
+    prefix = sha256(relpath.encode("utf-8")).hexdigest()[:16]
+    return [f"{prefix}-{index}" for index in range(count)]
+
+
+def split_files(
+    files: dict, chunk_size: int, chunk_overlap: int, workers: int = 1
+) -> Iterator[Tuple[str, list]]:
+    """Yield (relpath, chunks) for each file, in order
+
+    Files are split in-process by default; splitting is fast next to
+    embedding, and starting worker processes costs more than it saves on a
+    knowledge base of markdown notes (seconds each where they are spawned,
+    as on macOS). With workers > 1, files are split in that many processes,
+    and at most two files per worker are loaded or waiting to be consumed at
+    any time, so memory stays bounded however large the knowledge base is.
+    """
+    if workers <= 1 or len(files) <= 1:
+        for relpath, (abspath, _) in files.items():
+            yield relpath, split_file(abspath, chunk_size, chunk_overlap, relpath)
+        return
+
+    items = iter(files.items())
+    with ProcessPoolExecutor(max_workers=min(workers, len(files))) as pool:
+        in_flight = deque()
+
+        def submit(count):
+            for relpath, (abspath, _) in itertools.islice(items, count):
+                in_flight.append(
+                    (relpath, pool.submit(split_file, abspath, chunk_size, chunk_overlap, relpath))
+                )
+
+        submit(2 * workers)
+        while in_flight:
+            relpath, future = in_flight.popleft()
+            chunks = future.result()
+            submit(1)
+            yield relpath, chunks
+
+
+def group_files(
+    split: Iterator[Tuple[str, list]], max_chunks: int
+) -> Iterator[List[Tuple[str, list]]]:
+    """Group whole files until a group holds at least max_chunks chunks"""
+    group, size = [], 0
+    for relpath, chunks in split:
+        group.append((relpath, chunks))
+        size += len(chunks)
+        if size >= max_chunks:
+            yield group
+            group, size = [], 0
+    if group:
+        yield group
@@ -1,66 +1,255 @@
 """Knowledge base query tool using langchain for RAG"""
 
+import os
+import threading
+from collections import OrderedDict
 from crewai.tools import BaseTool
-from pydantic import BaseModel, Field
-from typing import Type
-from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings
+from pydantic import BaseModel, Field, model_validator
+from typing import Dict, List, Optional, Type
+from langchain_core.documents import Document
 from optimizer.config.settings import get_rag_config
+from optimizer.utils.embedding_cache import normalize_query
+from optimizer.utils.vector_utils import (
+    get_shared_vector_db,
+    read_index_manifest,
+    read_version_stamp,
+    similarity_search_many,
+)
+from optimizer.utils.metadata_filter import matches_nothing, metadata_filter
+from optimizer.utils.bm25 import load_bm25_index, reciprocal_rank_fusion
+from optimizer.utils.context_packing import pack_documents
+
+RESULT_CACHE_SIZE = 512
+
+# Formatted results shared by every tool instance in this process, keyed by
+# (DB path, collection, normalized query, k, hybrid, budget, filter, version)
+_result_cache = OrderedDict()
+_result_cache_lock = threading.Lock()
 
 
 class KnowledgeBaseInput(BaseModel):
-    query: str = Field(
-        ...,
+    query: Optional[str] = Field(
+        None,
         description="The search query or question to ask the knowledge base"
     )
+    queries: Optional[List[str]] = Field(
+        None,
+        description="Several queries to answer at once, e.g. one per required skill"
+    )
+    category: Optional[str] = Field(
+        None,
+        description="Only search this knowledge base folder: companies, developers or projects"
+    )
+    source_prefix: Optional[str] = Field(
+        None,
+        description="Only search files whose path starts with this, e.g. projects/torch"
+    )
+    entity: Optional[str] = Field(
+        None,
+        description="Only search one company, developer or project, by file name without .md"
+    )
+
+    @model_validator(mode="after")
+    def query_or_queries(self):
+        if not self.query and not self.queries:
+            raise ValueError("Provide either query or queries")
+        return self
 
 
 class KnowledgeBaseTool(BaseTool):
     name: str = "Knowledge base"
-    description: str = "A knowledge base that can be used to answer questions about the candidate's skills, projects, and experience."
+    description: str = (
+        "A knowledge base that can be used to answer questions about the candidate's skills, "
+        "projects, and experience. Pass `queries` to look up several skills in one call, "
+        "and `category`, `entity` or `source_prefix` to search only part of the knowledge base."
+    )
     args_schema: Type[BaseModel] = KnowledgeBaseInput
 
     vector_db_path: str = None
     collection_name: str = None
     embedding_model: str = None
+    embedding_backend: str = None
+    vector_store: str = None
     num_results: int = None
+    hybrid_search: bool = None
+    context_token_budget: int = None
+    embedding_cache_path: str = None
 
-    def __init__(self, vector_db_path: str, **kwargs):
+    def __init__(self, vector_db_path: str, embedding_cache_path: str = None, **kwargs):
         super().__init__(**kwargs)
         self.vector_db_path = vector_db_path
+        self.embedding_cache_path = embedding_cache_path
 
         rag_config = get_rag_config()
         self.collection_name = rag_config["collection_name"]
         self.embedding_model = rag_config["embedding_model"]
+        self.embedding_backend = rag_config["embedding_backend"]
+        self.vector_store = rag_config["vector_store"]
         self.num_results = rag_config["num_results"]
+        self.hybrid_search = rag_config["hybrid_search"]
+        self.context_token_budget = rag_config["context_token_budget"]
+
+    def _run(
+        self,
+        query: str = None,
+        queries: List[str] = None,
+        category: str = None,
+        source_prefix: str = None,
+        entity: str = None,
+    ) -> str:
+        filters = dict(category=category, source_prefix=source_prefix, entity=entity)
+        if queries:
+            results = self.search_many(([query] if query else []) + list(queries), **filters)
+            return "\n\n".join(
+                f"## Results for: {query}\n\n{result}" for query, result in results.items()
+            )
+        return self.search_many([query], **filters)[query]
+
+    def search_many(
+        self,
+        queries: List[str],
+        category: str = None,
+        source_prefix: str = None,
+        entity: str = None,
+    ) -> Dict[str, str]:
+        """Answer several queries, embedding and searching the misses together
 
-    def _run(self, query: str) -> str:
-        embedding_function = OpenAIEmbeddings(model=self.embedding_model)
-        vectorstore = Chroma(
-            persist_directory=self.vector_db_path,
-            embedding_function=embedding_function,
-            collection_name=self.collection_name
+        Queries not already in the result cache are embedded in one batched
+        request and looked up in one collection query. category, entity and
+        source_prefix (a path within the knowledge base) restrict every query
+        to matching chunks, filtered in the vector store before ranking.
+        Returns each query's formatted result (with its own deduplicated
+        sources), in input order.
+        """
+        # The version stamp changes whenever the embedder rebuilds the
+        # collection, so stale results are never served
+        version = read_version_stamp(self.vector_db_path)
+        try:
+            where = self._filter(category, source_prefix, entity)
+        except ValueError as e:
+            return {query: str(e) for query in queries}
+        keys = {query: self._cache_key(query, where, version) for query in queries}
+        results = {}
+        with _result_cache_lock:
+            for query, key in keys.items():
+                if key in _result_cache:
+                    _result_cache.move_to_end(key)
+                    results[query] = _result_cache[key]
+
+        pending = [query for query in keys if query not in results]
+        if pending:
+            searched = self._search(pending, where, version)
+            with _result_cache_lock:
+                for query, result in zip(pending, searched):
+                    _result_cache[keys[query]] = result
+                    results[query] = result
+                while len(_result_cache) > RESULT_CACHE_SIZE:
+                    _result_cache.popitem(last=False)
+
+        return {query: results[query] for query in keys}
+
+    def _filter(self, category: str, source_prefix: str, entity: str) -> Optional[dict]:
+        paths = None
+        if source_prefix:
+            # Chroma has no prefix operator, so match the indexed files here
+            manifest = read_index_manifest(self.vector_db_path)
+            if manifest is None:
+                raise ValueError(
+                    "Cannot filter by source_prefix: the vector DB has no index manifest. "
+                    "Rebuild the knowledge base (make vector_db) or search without it."
+                )
+            prefix = source_prefix.removeprefix("./").lstrip("/")
+            paths = [path for path in manifest["files"] if path.startswith(prefix)]
+        return metadata_filter(category=category, entity=entity, paths=paths)
+
+    def _cache_key(self, query: str, where: Optional[dict], version: Optional[str]) -> tuple:
+        return (
+            os.path.realpath(self.vector_db_path),
+            self.collection_name,
+            normalize_query(query),
+            self.num_results,
+            self.hybrid_search,
+            self.context_token_budget,
+            repr(where),
+            version,
         )
 
-        docs = vectorstore.similarity_search_with_score(query, k=self.num_results)
+    def _search(
+        self, queries: List[str], where: Optional[dict] = None, version: str = None
+    ) -> List[str]:
+        if matches_nothing(where):
+            # e.g. no indexed file matches the source prefix
+            return [format_results([]) for _ in queries]
+        vectorstore = get_shared_vector_db(
+            vector_db_abspath=self.vector_db_path,
+            collection_name=self.collection_name,
+            embedding_model=self.embedding_model,
+            embedding_cache_path=self.embedding_cache_path,
+            embedding_backend=self.embedding_backend,
+            vector_store=self.vector_store,
+        )
+        bm25 = load_bm25_index(self.vector_db_path, version) if self.hybrid_search else None
+        # Fuse deeper candidate lists so exact-term hits that rank low on
+        # similarity still make the cut without raising num_results
+        depth = self.num_results if bm25 is None else 2 * self.num_results
+
+        if len(queries) == 1:
+            dense = [
+                [
+                    doc
+                    for doc, _ in vectorstore.similarity_search_with_score(
+                        queries[0], k=depth, filter=where
+                    )
+                ]
+            ]
+        else:
+            dense = similarity_search_many(vectorstore, queries, depth, filter=where)
+
+        results = []
+        for query, docs in zip(queries, dense):
+            if bm25 is not None:
+                by_id = {doc.id: doc for doc in docs}
+                lexical = [chunk_id for chunk_id, _ in bm25.search(query, depth, where)]
+                fused = reciprocal_rank_fusion([list(by_id), lexical])[:self.num_results]
+                docs = [by_id.get(chunk_id) or bm25.document(chunk_id) for chunk_id in fused]
+
+            packed = pack_documents(docs, query, self.context_token_budget)
+            if packed.tokens_saved > 0:
+                print(
+                    f"📦 Packed knowledge base context for '{query}': "
+                    f"{packed.tokens_before} → {packed.tokens_after} tokens "
+                    f"({packed.tokens_saved} saved)"
+                )
+            results.append(format_results(packed.passages))
+        return results
+
+    async def _arun(
+        self,
+        query: str = None,
+        queries: List[str] = None,
+        category: str = None,
+        source_prefix: str = None,
+        entity: str = None,
+    ) -> str:
+        return self._run(query, queries, category, source_prefix, entity)
 
-        if not docs:
-            return "No relevant content found.\n\nSources:"
 
-        contents = []
-        sources = []
-        for doc, score in docs:
-            contents.append(doc.page_content)
-            source = doc.metadata.get('source', 'Unknown')
-            if source not in sources:
-                sources.append(source)
+def format_results(docs: List[Document]) -> str:
+    """Join chunk contents and list each distinct source once"""
+    if not docs:
+        return "No relevant content found.\n\nSources:"
 
-        answer = "\n\n".join(contents)
-        result = f"{answer}\n\nSources:\n"
-        for source in sources:
-            result += f"- {source}\n"
+    contents = []
+    sources = []
+    for doc in docs:
+        contents.append(doc.page_content)
+        source = doc.metadata.get('source', 'Unknown')
+        if source not in sources:
+            sources.append(source)
 
-        return result.strip()
+    answer = "\n\n".join(contents)
+    result = f"{answer}\n\nSources:\n"
+    for source in sources:
+        result += f"- {source}\n"
 
-    async def _arun(self, query: str) -> str:
-        return self._run(query)
+    return result.strip()
@@ -0,0 +1,123 @@
+"""Concurrent, batched document embedding with backoff on rate limits"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+from langchain_core.embeddings import Embeddings
+
+MAX_BACKOFF_SECONDS = 60.0
+
+
+def error_status(error: Exception) -> Optional[int]:
+    """HTTP status of an error raised by openai (or any httpx-based client)"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors and dropped connections are worth retrying"""
+    status = error_status(error)
+    if status is not None:
+        return status == 429 or status >= 500
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class BatchedEmbeddings(Embeddings):
+    """Embeddings wrapper that sends documents in concurrent batches
+
+    embed_documents() splits the texts into batches of batch_size and embeds
+    up to concurrency batches at a time. A 429 response pauses every worker
+    until the provider's Retry-After (or an exponential backoff with jitter)
+    has passed, then the batch is retried, up to max_retries times. Server
+    errors and dropped connections are retried with the same backoff.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        batch_size: int = 64,
+        concurrency: int = 4,
+        max_retries: int = 6,
+        backoff_seconds: float = 1.0,
+        on_progress: Optional[Callable[[int, int, float], None]] = None,
+        progress_interval: float = 1.0,
+    ):
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.on_progress = on_progress
+        self.progress_interval = progress_interval
+        self.rate_limited = 0
+        self._lock = threading.Lock()
+        self._resume_at = 0.0
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._with_backoff(self.embeddings.embed_query, text)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        batches = [
+            texts[start:start + self.batch_size]
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        start = time.perf_counter()
+        done = 0
+        last_report = start
+
+        def embed_batch(batch):
+            nonlocal done, last_report
+            vectors = self._with_backoff(self.embeddings.embed_documents, batch)
+            with self._lock:
+                done += len(batch)
+                now = time.perf_counter()
+                report = done == len(texts) or now - last_report >= self.progress_interval
+                if report:
+                    last_report = now
+            if report and self.on_progress:
+                self.on_progress(done, len(texts), now - start)
+            return vectors
+
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as pool:
+            results = list(pool.map(embed_batch, batches))
+        return [vector for vectors in results for vector in vectors]
+
+    def _with_backoff(self, embed, payload):
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_cooldown()
+            try:
+                return embed(payload)
+            except Exception as e:
+                if not is_retryable(e) or attempt == self.max_retries:
+                    raise
+                delay = retry_after_seconds(e)
+                if delay is None:
+                    delay = self.backoff_seconds * 2 ** attempt * random.uniform(0.5, 1.0)
+                with self._lock:
+                    if error_status(e) == 429:
+                        self.rate_limited += 1
+                    self._resume_at = max(
+                        self._resume_at, time.monotonic() + min(delay, MAX_BACKOFF_SECONDS)
+                    )
+
+    def _wait_for_cooldown(self) -> None:
+        while True:
+            with self._lock:
+                remaining = self._resume_at - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
@@ -0,0 +1,143 @@
+"""BM25 inverted index kept next to the Chroma collection, and rank fusion"""
+
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from langchain_core.documents import Document
+from optimizer.utils.metadata_filter import matches
+
+BM25_INDEX_NAME = ".kb-bm25.json"
+RRF_K = 60
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+
+# Loaded indexes, keyed by (real index path, knowledge base version)
+_loaded_indexes = {}
+_loaded_indexes_lock = threading.Lock()
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens; keeps `c++`, `c#` and version numbers intact"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """Okapi BM25 over knowledge base chunks, addressable by chunk ID
+
+    Each chunk's term frequencies, text and metadata are stored, so lexical
+    hits can be returned without a round trip to the vector store. Chunks are
+    added and removed by ID as the embedder indexes files.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.docs: Dict[str, dict] = {}
+        self._postings: Optional[Dict[str, Dict[str, int]]] = None
+
+    def add(self, ids: Iterable[str], documents: Iterable[Document]) -> None:
+        for chunk_id, doc in zip(ids, documents):
+            self.docs[chunk_id] = {
+                "terms": Counter(tokenize(doc.page_content)),
+                "page_content": doc.page_content,
+                "metadata": doc.metadata,
+            }
+        self._postings = None
+
+    def remove(self, ids: Iterable[str]) -> None:
+        for chunk_id in ids:
+            self.docs.pop(chunk_id, None)
+        self._postings = None
+
+    def _index(self) -> Dict[str, Dict[str, int]]:
+        if self._postings is None:
+            postings = defaultdict(dict)
+            for chunk_id, doc in self.docs.items():
+                for term, count in doc["terms"].items():
+                    postings[term][chunk_id] = count
+            self._postings = dict(postings)
+            self._lengths = {
+                chunk_id: sum(doc["terms"].values()) for chunk_id, doc in self.docs.items()
+            }
+            self._average_length = (
+                sum(self._lengths.values()) / len(self._lengths) if self._lengths else 0.0
+            )
+        return self._postings
+
+    def search(self, query: str, k: int, filter: Optional[dict] = None) -> List[Tuple[str, float]]:
+        """Return up to k (chunk ID, score) pairs, best first
+
+        filter is a Chroma-style `where` on chunk metadata.
+        """
+        postings = self._index()
+        total = len(self.docs)
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings_list = postings.get(term)
+            if not postings_list:
+                continue
+            idf = math.log(1 + (total - len(postings_list) + 0.5) / (len(postings_list) + 0.5))
+            for chunk_id, count in postings_list.items():
+                if filter and not matches(self.docs[chunk_id]["metadata"], filter):
+                    continue
+                norm = 1 - self.b + self.b * self._lengths[chunk_id] / self._average_length
+                scores[chunk_id] += idf * count * (self.k1 + 1) / (count + self.k1 * norm)
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+    def document(self, chunk_id: str) -> Document:
+        doc = self.docs[chunk_id]
+        return Document(page_content=doc["page_content"], metadata=doc["metadata"], id=chunk_id)
+
+    def save(self, path: str) -> None:
+        tmp_file = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump({"k1": self.k1, "b": self.b, "docs": self.docs}, f, separators=(",", ":"))
+        os.replace(tmp_file, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with open(path) as f:
+            data = json.load(f)
+        index = cls(k1=data["k1"], b=data["b"])
+        index.docs = {
+            chunk_id: {**doc, "terms": Counter(doc["terms"])}
+            for chunk_id, doc in data["docs"].items()
+        }
+        return index
+
+
+def bm25_index_path(vector_db_abspath: str) -> str:
+    return os.path.join(vector_db_abspath, BM25_INDEX_NAME)
+
+
+def load_bm25_index(vector_db_abspath: str, version: Optional[str]) -> Optional[BM25Index]:
+    """Return the DB's BM25 index, loaded once per knowledge base version
+
+    Returns None for a vector DB built before BM25 indexing existed.
+    """
+    path = bm25_index_path(vector_db_abspath)
+    key = (os.path.realpath(path), version)
+    with _loaded_indexes_lock:
+        if key not in _loaded_indexes:
+            try:
+                index = BM25Index.load(path)
+            except FileNotFoundError:
+                index = None
+            for stale in [k for k in _loaded_indexes if k[0] == key[0]]:
+                del _loaded_indexes[stale]
+            _loaded_indexes[key] = index
+        return _loaded_indexes[key]
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = RRF_K) -> List[str]:
+    """Merge ranked ID lists, scoring each ID by the sum of 1 / (k + rank)"""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, start=1):
+            scores[chunk_id] += 1.0 / (k + rank)
+    # sorted() is stable, so ties keep the order of the first ranking
+    return sorted(scores, key=lambda chunk_id: -scores[chunk_id])
@@ -0,0 +1,152 @@
+"""Pack retrieved chunks into a token budget before they reach the agent"""
+
+import itertools
+import math
+import re
+from dataclasses import dataclass
+from typing import List, Tuple
+from langchain_core.documents import Document
+from optimizer.utils.bm25 import tokenize
+
+UNIT_BOUNDARY = re.compile(r"(?<=[.!?])[ \t]+|\n+")
+GAP_MARKER = "…"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)"""
+    return math.ceil(len(text) / 4)
+
+
+@dataclass
+class PackedContext:
+    passages: List[Document]
+    tokens_before: int
+    tokens_after: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+def merge_chunks(docs: List[Document]) -> List[Document]:
+    """Merge overlapping or adjacent chunks of the same source into passages
+
+    Chunks of one source are sorted by their `start_index` and overlapping
+    or touching ranges merged in one pass, so the result does not depend on
+    the order chunks were retrieved in. Each passage takes the rank and
+    metadata of its best-ranked chunk. Chunks without a start index are
+    merged when one's end overlaps another's beginning textually.
+    """
+    by_source = {}
+    for rank, doc in enumerate(docs):
+        by_source.setdefault(doc.metadata.get("source"), []).append((rank, doc))
+
+    passages = []
+    for chunks in by_source.values():
+        placed, unplaced = [], []
+        for chunk in chunks:
+            (unplaced if chunk[1].metadata.get("start_index") is None else placed).append(chunk)
+        placed.sort(key=lambda chunk: chunk[1].metadata["start_index"])
+        passages.extend(_merge_ranges(placed))
+        passages.extend(_merge_text(unplaced))
+    passages.sort(key=lambda passage: passage[0])
+    return [passage for _, passage in passages]
+
+
+def _passage(rank: int, doc: Document, text: str, start=None) -> Tuple[int, Document]:
+    metadata = dict(doc.metadata)
+    if start is not None:
+        metadata["start_index"] = start
+    return rank, Document(page_content=text, metadata=metadata)
+
+
+def _merge_ranges(chunks: List[Tuple[int, Document]]) -> List[Tuple[int, Document]]:
+    """Merge chunks sorted by start_index into runs of overlapping ranges"""
+    merged = []
+    for rank, doc in chunks:
+        start, text = doc.metadata["start_index"], doc.page_content
+        if merged and start <= merged[-1]["end"]:
+            run = merged[-1]
+            if start + len(text) > run["end"]:
+                run["text"] += text[run["end"] - start:]
+                run["end"] = start + len(text)
+            if rank < run["rank"]:
+                run["rank"], run["doc"] = rank, doc
+        else:
+            merged.append(
+                {"start": start, "end": start + len(text), "text": text, "rank": rank, "doc": doc}
+            )
+    return [_passage(run["rank"], run["doc"], run["text"], run["start"]) for run in merged]
+
+
+def _merge_text(chunks: List[Tuple[int, Document]]) -> List[Tuple[int, Document]]:
+    """Merge chunks without offsets (a DB built before they were recorded) on shared text"""
+    passages = [(rank, doc, doc.page_content) for rank, doc in chunks]
+    merged = True
+    while merged:
+        merged = False
+        for i, j in itertools.permutations(range(len(passages)), 2):
+            text = _join_text(passages[i][2], passages[j][2])
+            if text is not None:
+                best = min(passages[i], passages[j], key=lambda passage: passage[0])
+                passages[i] = (best[0], best[1], text)
+                del passages[j]
+                merged = True
+                break
+    return [_passage(rank, doc, text) for rank, doc, text in passages]
+
+
+def _join_text(first: str, second: str):
+    """first followed by second, if second begins with first's last 20+ characters"""
+    if second in first:
+        return first
+    for size in range(min(len(first), len(second)), 20, -1):
+        if first.endswith(second[:size]):
+            return first + second[size:]
+    return None
+
+
+def pack_documents(docs: List[Document], query: str, token_budget: int) -> PackedContext:
+    """Merge overlapping chunks, then keep the query-relevant sentences
+
+    If the merged passages still exceed token_budget, sentences (and lines)
+    are ranked by how many query terms they contain, ties going to earlier
+    passages, and kept until the budget is spent. Kept sentences stay in
+    document order, with a gap marker where text was dropped.
+    """
+    tokens_before = sum(estimate_tokens(doc.page_content) for doc in docs)
+    passages = merge_chunks(docs)
+    tokens = sum(estimate_tokens(passage.page_content) for passage in passages)
+    if token_budget <= 0 or tokens <= token_budget:
+        return PackedContext(passages, tokens_before, tokens)
+
+    terms = set(tokenize(query))
+    units = []
+    for passage_rank, passage in enumerate(passages):
+        for position, unit in enumerate(UNIT_BOUNDARY.split(passage.page_content)):
+            if unit.strip():
+                score = len(terms & set(tokenize(unit)))
+                units.append((-score, passage_rank, position, unit))
+
+    kept = {}
+    spent = 0
+    for _, passage_rank, position, unit in sorted(units):
+        cost = estimate_tokens(unit)
+        # The best sentence is kept even if it alone exceeds the budget
+        if spent + cost > token_budget and spent:
+            continue
+        kept.setdefault(passage_rank, []).append((position, unit))
+        spent += cost
+
+    packed = []
+    for passage_rank, passage in enumerate(passages):
+        if passage_rank not in kept:
+            continue
+        parts, previous = [], -1
+        for position, unit in sorted(kept[passage_rank]):
+            if position != previous + 1:
+                parts.append(GAP_MARKER)
+            parts.append(unit)
+            previous = position
+        packed.append(Document(page_content="\n".join(parts), metadata=passage.metadata))
+    return PackedContext(packed, tokens_before, spent)
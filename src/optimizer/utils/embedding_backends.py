@@ -0,0 +1,96 @@
+"""Embedding backends selectable through RagSettings.embedding_backend"""
+
+import math
+import re
+import zlib
+from collections import Counter
+from typing import List
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+LOCAL_DIMENSIONS = 1024
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+
+
+class HashingEmbeddings(Embeddings):
+    """Offline embeddings from feature-hashed word and character n-grams
+
+    Each text is reduced to its words, word bigrams and the character
+    trigrams of its words. Every feature is hashed into one of `dimensions`
+    buckets with a hashed sign and weighted by 1 + log(term frequency), and
+    the vector is L2-normalized, so cosine similarity approximates TF overlap.
+    Runs in-process with NumPy and needs no network or model download.
+    """
+
+    def __init__(self, dimensions: int = LOCAL_DIMENSIONS):
+        self.dimensions = dimensions
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        rows, columns, weights = [], [], []
+        for row, text in enumerate(texts):
+            for feature, count in features(text).items():
+                digest = zlib.crc32(feature.encode("utf-8"))
+                rows.append(row)
+                columns.append(digest % self.dimensions)
+                sign = 1.0 if digest & 0x80000000 else -1.0
+                weights.append(sign * (1.0 + math.log(count)))
+
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        np.add.at(matrix, (np.array(rows, dtype=np.intp), np.array(columns, dtype=np.intp)), weights)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1.0, norms)
+        return matrix.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def features(text: str) -> Counter:
+    words = TOKEN_PATTERN.findall(text.lower())
+    counts = Counter(words)
+    counts.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    for word in words:
+        padded = f"<{word}>"
+        counts.update(f"#{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    return counts
+
+
+def _openai_embeddings(model: str, **options) -> Embeddings:
+    from langchain_openai import OpenAIEmbeddings
+
+    return OpenAIEmbeddings(model=model, **options)
+
+
+def _local_embeddings(model: str, **options) -> Embeddings:
+    return HashingEmbeddings()
+
+
+EMBEDDING_BACKENDS = {
+    "openai": _openai_embeddings,
+    "local": _local_embeddings,
+}
+
+
+def create_embeddings(backend: str, model: str, **options) -> Embeddings:
+    """Instantiate the embeddings client for a backend
+
+    options are client settings (max_retries, say) that only the OpenAI
+    backend uses.
+    """
+    try:
+        factory = EMBEDDING_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(
+            f"Unknown embedding backend '{backend}', expected one of {sorted(EMBEDDING_BACKENDS)}"
+        )
+    return factory(model, **options)
+
+
+def embedding_model_id(backend: str, model: str) -> str:
+    """Identity of the vectors a backend produces, used to key caches and stores"""
+    if backend == "openai":
+        return model
+    return f"{backend}:hashing-{LOCAL_DIMENSIONS}"
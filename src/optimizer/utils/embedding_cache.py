@@ -0,0 +1,245 @@
+"""Two-tier cache of query embeddings: in-memory LRU backed by SQLite"""
+
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from hashlib import sha256
+from typing import List, Optional
+from langchain_core.embeddings import Embeddings
+
+# Process-wide caches, keyed by real SQLite path (None for memory-only)
+_embedding_caches = {}
+_embedding_caches_lock = threading.Lock()
+
+# Keys per SELECT, well under SQLite's bound-parameter limit
+SQLITE_BATCH = 500
+# Rows written between checks of the disk tier's size
+EVICTION_INTERVAL = 256
+
+
+def normalize_query(text: str) -> str:
+    """Case- and whitespace-insensitive form of a query used as its cache key"""
+    return " ".join(text.lower().split())
+
+
+class EmbeddingCache:
+    """Embedding vectors keyed by (model, normalized text)
+
+    Lookups go to an in-memory LRU first, then to a SQLite table of float32
+    blobs; disk hits are promoted into memory. Each tier is bounded by entry
+    count and evicts least recently used entries first, where the disk tier
+    only sees the reads that missed memory. The disk tier's size is checked
+    once every eviction_interval rows written, so it can briefly hold up to
+    that many entries over max_disk_entries.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        memory_size: int = 1024,
+        max_disk_entries: int = 50_000,
+        eviction_interval: int = EVICTION_INTERVAL,
+    ):
+        self.path = path
+        self.memory_size = memory_size
+        self.max_disk_entries = max_disk_entries
+        self.eviction_interval = eviction_interval
+        self._written = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " key TEXT PRIMARY KEY, model TEXT NOT NULL,"
+                " vector BLOB NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        return sha256(f"{model}\n{text}".encode("utf-8")).hexdigest()
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        return self.get_many(model, [text])[0]
+
+    def get_many(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        """Look up several texts at once; misses come back as None"""
+        keys = [self.key(model, text) for text in texts]
+        found = {}
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+                    self.hits += 1
+
+            missing = [key for key in dict.fromkeys(keys) if key not in found]
+            if self._db is not None and missing:
+                for start in range(0, len(missing), SQLITE_BATCH):
+                    batch = missing[start:start + SQLITE_BATCH]
+                    placeholders = ",".join("?" * len(batch))
+                    rows = self._db.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                        batch,
+                    ).fetchall()
+                    if rows:
+                        self._db.executemany(
+                            "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                            [(time.time(), key) for key, _ in rows],
+                        )
+                    for key, blob in rows:
+                        vector = array("f")
+                        vector.frombytes(blob)
+                        self._remember(key, vector)
+                        found[key] = vector
+                        self.hits += 1
+                        self.disk_hits += 1
+                self._db.commit()
+
+            self.misses += sum(1 for key in keys if key not in found)
+            return [list(found[key]) if key in found else None for key in keys]
+
+    def put(self, model: str, text: str, vector: List[float]) -> None:
+        self.put_many(model, [text], [vector])
+
+    def put_many(self, model: str, texts: List[str], vectors: List[List[float]]) -> None:
+        entries = [
+            (self.key(model, text), array("f", vector)) for text, vector in zip(texts, vectors)
+        ]
+        with self._lock:
+            for key, packed in entries:
+                self._remember(key, packed)
+            if self._db is None:
+                return
+            now = time.time()
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, vector, last_used)"
+                " VALUES (?, ?, ?, ?)",
+                [(key, model, packed.tobytes(), now) for key, packed in entries],
+            )
+            self._written += len(entries)
+            if self._written >= self.eviction_interval:
+                self._written = 0
+                self._evict()
+            self._db.commit()
+
+    def _evict(self) -> None:
+        """Delete least recently used rows beyond max_disk_entries"""
+        count = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        if count > self.max_disk_entries:
+            self._db.execute(
+                "DELETE FROM embeddings WHERE key IN ("
+                " SELECT key FROM embeddings"
+                " ORDER BY last_used, rowid LIMIT ?)",
+                (count - self.max_disk_entries,),
+            )
+
+    def _remember(self, key: str, vector: array) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            disk_entries = (
+                self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+                if self._db is not None
+                else 0
+            )
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries,
+            }
+
+
+def get_embedding_cache(path: Optional[str] = None, **options) -> EmbeddingCache:
+    """Return the EmbeddingCache shared by every caller in this process for path
+
+    options are passed to EmbeddingCache when the cache is first created.
+    """
+    key = os.path.realpath(path) if path else None
+    with _embedding_caches_lock:
+        cache = _embedding_caches.get(key)
+        if cache is None:
+            cache = EmbeddingCache(path, **options)
+            _embedding_caches[key] = cache
+        return cache
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that reuses vectors from EmbeddingCaches
+
+    Queries are looked up in cache by their normalized text, but the
+    provider is always sent the query as written. Documents are looked up by
+    their exact text in document_cache, so byte-identical chunks are never
+    embedded twice, whatever build or chunking settings produced them.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model: str,
+        cache: Optional[EmbeddingCache] = None,
+        document_cache: Optional[EmbeddingCache] = None,
+    ):
+        self.embeddings = embeddings
+        self.model = model
+        self.cache = cache
+        self.document_cache = document_cache
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.cache is None:
+            return self.embeddings.embed_query(text)
+        normalized = normalize_query(text)
+        vector = self.cache.get(self.model, normalized)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.cache.put(self.model, normalized, vector)
+        return vector
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries, sending all cache misses in one request"""
+        if self.cache is None:
+            return self.embeddings.embed_documents(texts)
+        normalized = [normalize_query(text) for text in texts]
+        vectors = self.cache.get_many(self.model, normalized)
+        # One text per missing key: the first query that normalized to it
+        missing = {}
+        for text, key, vector in zip(texts, normalized, vectors):
+            if vector is None:
+                missing.setdefault(key, text)
+        if missing:
+            embedded = self.embeddings.embed_documents(list(missing.values()))
+            self.cache.put_many(self.model, list(missing), embedded)
+            by_key = dict(zip(missing, embedded))
+            vectors = [v if v is not None else by_key[k] for k, v in zip(normalized, vectors)]
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.document_cache is None:
+            return self.embeddings.embed_documents(texts)
+        vectors = self.document_cache.get_many(self.model, texts)
+        missing = list(dict.fromkeys(text for text, v in zip(texts, vectors) if v is None))
+        if missing:
+            embedded = self.embeddings.embed_documents(missing)
+            self.document_cache.put_many(self.model, missing, embedded)
+            by_text = dict(zip(missing, embedded))
+            vectors = [v if v is not None else by_text[t] for t, v in zip(texts, vectors)]
+        return vectors
@@ -0,0 +1,134 @@
+"""Split knowledge base markdown along its heading hierarchy
+
+Also the module split worker processes import, so it stays light: no
+langchain_community, and the character splitter is only imported when a
+section is too long.
+"""
+
+import os
+import re
+from typing import List, Tuple
+from langchain_core.documents import Document
+
+HEADING = re.compile(r"^(#{1,6})[ \t]+(.+?)[ \t#]*$")
+FENCE = re.compile(r"^[ \t]*(```|~~~)")
+HEADING_SEPARATOR = " > "
+# Category of files at the top of the knowledge base rather than in a folder
+GENERAL_CATEGORY = "general"
+
+
+def path_metadata(relpath: str) -> dict:
+    """Path, category (top-level folder) and entity (file name) of a knowledge base file
+
+    `projects/torch-saas.md` is category `projects`, entity `torch-saas`.
+    """
+    path = relpath.replace(os.sep, "/")
+    parts = path.split("/")
+    return {
+        "path": path,
+        "category": parts[0] if len(parts) > 1 else GENERAL_CATEGORY,
+        "entity": os.path.splitext(parts[-1])[0],
+    }
+
+
+def sections(text: str) -> List[Tuple[int, int, Tuple[str, ...]]]:
+    """(start, end, heading path) of each heading's section, in order
+
+    A section runs from its heading line to the next heading of any level.
+    Text before the first heading has an empty path; `#` lines inside fenced
+    code blocks are not headings.
+    """
+    found = []
+    stack = []
+    start = offset = 0
+    in_fence = False
+    for line in text.splitlines(keepends=True):
+        if FENCE.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else HEADING.match(line.rstrip("\r\n"))
+        if match:
+            if offset > start:
+                found.append((start, offset, tuple(title for _, title in stack)))
+            level = len(match.group(1))
+            while stack and stack[-1][0] >= level:
+                stack.pop()
+            stack.append((level, match.group(2)))
+            start = offset
+        offset += len(line)
+    if offset > start:
+        found.append((start, offset, tuple(title for _, title in stack)))
+    return found
+
+
+def split_markdown(
+    text: str, metadata: dict, chunk_size: int, chunk_overlap: int
+) -> List[Document]:
+    """Chunk markdown by section, with each chunk's heading path and start offset
+
+    Consecutive sections are merged while they fit in chunk_size, keeping
+    their common heading path, so small subsections don't each become a
+    chunk. Sections longer than chunk_size are split further by character
+    count. Chunk text is an exact slice of the file, starting at
+    `start_index`.
+    """
+    groups = []
+    for start, end, path in sections(text):
+        if not text[start:end].strip():
+            continue
+        if groups and end - groups[-1][0] <= chunk_size:
+            group_start, _, group_path = groups[-1]
+            common = 0
+            while common < min(len(path), len(group_path)) and path[common] == group_path[common]:
+                common += 1
+            groups[-1] = (group_start, end, group_path[:common])
+        else:
+            groups.append((start, end, path))
+
+    chunks = []
+    for start, end, path in groups:
+        section_metadata = {**metadata, "heading_path": HEADING_SEPARATOR.join(path)}
+        section = text[start:end]
+        if len(section) > chunk_size:
+            for piece in _character_splitter(chunk_size, chunk_overlap).create_documents([section]):
+                chunks.append(
+                    Document(
+                        page_content=piece.page_content,
+                        metadata={
+                            **section_metadata,
+                            "start_index": start + piece.metadata["start_index"],
+                        },
+                    )
+                )
+        else:
+            content = section.strip()
+            chunks.append(
+                Document(
+                    page_content=content,
+                    metadata={**section_metadata, "start_index": start + section.index(content)},
+                )
+            )
+    return chunks
+
+
+def _character_splitter(chunk_size: int, chunk_overlap: int):
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        add_start_index=True,
+    )
+
+
+def split_file(abspath: str, chunk_size: int, chunk_overlap: int, relpath: str = None) -> list:
+    """Read one markdown file and split it into chunks
+
+    Chunks follow the file's headings and carry its category, entity and
+    heading path as metadata, derived from relpath (the path within the
+    knowledge base) or, without one, from the file name.
+    """
+    with open(abspath, encoding="utf-8") as f:
+        text = f.read()
+    metadata = {"source": abspath, **path_metadata(relpath or os.path.basename(abspath))}
+    return split_markdown(text, metadata, chunk_size, chunk_overlap)
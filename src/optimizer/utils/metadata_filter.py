@@ -0,0 +1,69 @@
+"""Chroma-style `where` filters over chunk metadata"""
+
+from typing import Any, Iterable, Optional
+
+
+def metadata_filter(
+    category: str = None, entity: str = None, paths: Iterable[str] = None
+) -> Optional[dict]:
+    """Build a `where` filter matching all of the given conditions
+
+    paths restricts results to chunks of those knowledge base files. Returns
+    None when there is nothing to filter on.
+    """
+    clauses = []
+    if category:
+        clauses.append({"category": category})
+    if entity:
+        clauses.append({"entity": entity})
+    if paths is not None:
+        clauses.append({"path": {"$in": sorted(paths)}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def matches_nothing(where: Optional[dict]) -> bool:
+    """True for a filter with an empty $in, which Chroma rejects instead of matching nothing"""
+    if not where:
+        return False
+    return any(
+        isinstance(condition, dict) and condition.get("$in") == []
+        for clause in where.get("$and", [where])
+        for condition in clause.values()
+    )
+
+
+def matches(metadata: dict, where: Optional[dict]) -> bool:
+    """Evaluate a `where` filter (equality, $eq/$ne/$in/$nin, $and/$or) in Python"""
+    if not where:
+        return True
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(metadata, clause) for clause in condition):
+                return False
+        elif not _compare(metadata.get(key), condition):
+            return False
+    return True
+
+
+def _compare(value: Any, condition: Any) -> bool:
+    if not isinstance(condition, dict):
+        return value == condition
+    for operator, operand in condition.items():
+        if operator == "$eq":
+            ok = value == operand
+        elif operator == "$ne":
+            ok = value != operand
+        elif operator == "$in":
+            ok = value in operand
+        elif operator == "$nin":
+            ok = value not in operand
+        else:
+            raise ValueError(f"Unsupported filter operator '{operator}'")
+        if not ok:
+            return False
+    return True
@@ -0,0 +1,270 @@
+"""Brute-force vector store over a memory-mapped float32 matrix"""
+
+import json
+import os
+import threading
+import uuid
+from typing import Any, Iterable, List, Optional, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from optimizer.utils.metadata_filter import matches
+
+
+def is_valid_numpy_vector_db(path: str, collection_name: str) -> bool:
+    return os.path.exists(os.path.join(path, f"{collection_name}.json"))
+
+
+class NumpyVectorStore(VectorStore):
+    """Exact top-k search with one matmul over L2-normalized embeddings
+
+    The collection is two files in persist_directory: `<collection>.json`
+    holds the dimensions, the name of the vector file and one entry (ID, text,
+    metadata) per row; the vector file is a raw row-major float32 matrix that
+    is memory-mapped for search. Appends grow the vector file in place and
+    deletes write a compacted copy, and the sidecar is replaced atomically
+    after either, so readers never see a half-written collection. Searches
+    reload the sidecar whenever it changed on disk.
+
+    Takes the same constructor arguments as langchain_chroma.Chroma.
+    """
+
+    def __init__(
+        self,
+        persist_directory: str,
+        embedding_function: Embeddings,
+        collection_name: str,
+    ):
+        self.persist_directory = persist_directory
+        self.collection_name = collection_name
+        self._embedding_function = embedding_function
+        self._sidecar = os.path.join(persist_directory, f"{collection_name}.json")
+        self._lock = threading.Lock()
+        self._loaded_mtime = None
+        self._rows: List[dict] = []
+        self._row_by_id = {}
+        self._dimensions = None
+        self._vector_file = None
+        self._matrix = None
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding_function
+
+    # Loading and saving
+
+    def _refresh(self) -> None:
+        try:
+            mtime = os.stat(self._sidecar).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._loaded_mtime:
+            return
+        with open(self._sidecar) as f:
+            data = json.load(f)
+        self._dimensions = data["dimensions"]
+        self._vector_file = data["vector_file"]
+        self._rows = data["rows"]
+        self._row_by_id = {row["id"]: index for index, row in enumerate(self._rows)}
+        self._matrix = None
+        if self._rows:
+            self._matrix = np.memmap(
+                os.path.join(self.persist_directory, self._vector_file),
+                dtype=np.float32,
+                mode="r",
+                shape=(len(self._rows), self._dimensions),
+            )
+        self._loaded_mtime = mtime
+
+    def _save_sidecar(self) -> None:
+        tmp_file = f"{self._sidecar}.{os.getpid()}.tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(
+                {
+                    "dimensions": self._dimensions,
+                    "vector_file": self._vector_file,
+                    "rows": self._rows,
+                },
+                f,
+                separators=(",", ":"),
+            )
+        os.replace(tmp_file, self._sidecar)
+        self._loaded_mtime = None
+
+    def _rewrite(self, keep: List[int], extra: Optional[np.ndarray] = None) -> Optional[str]:
+        """Write the kept rows (plus extra vectors) to a new vector file
+
+        Returns the name of the previous vector file, to be removed once the
+        new sidecar is in place.
+        """
+        old_file = self._vector_file
+        self._vector_file = f"{self.collection_name}.{uuid.uuid4().hex[:12]}.f32"
+        with open(os.path.join(self.persist_directory, self._vector_file), "wb") as f:
+            if keep:
+                f.write(np.ascontiguousarray(self._matrix[keep]).tobytes())
+            if extra is not None:
+                f.write(extra.tobytes())
+        self._rows = [self._rows[index] for index in keep]
+        return old_file
+
+    # VectorStore interface
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = metadatas or [{} for _ in texts]
+        ids = list(ids) if ids else [uuid.uuid4().hex for _ in texts]
+        vectors = normalize(
+            np.asarray(self._embedding_function.embed_documents(texts), dtype=np.float32)
+        )
+
+        with self._lock:
+            os.makedirs(self.persist_directory, exist_ok=True)
+            self._refresh()
+            if self._dimensions is None:
+                self._dimensions = vectors.shape[1]
+            elif vectors.shape[1] != self._dimensions:
+                raise ValueError(
+                    f"Embeddings have {vectors.shape[1]} dimensions, "
+                    f"collection has {self._dimensions}"
+                )
+
+            new_rows = [
+                {"id": chunk_id, "page_content": text, "metadata": metadata or {}}
+                for chunk_id, text, metadata in zip(ids, texts, metadatas)
+            ]
+            replaced = {self._row_by_id[i] for i in ids if i in self._row_by_id}
+            old_file = None
+            if replaced or self._vector_file is None:
+                keep = [index for index in range(len(self._rows)) if index not in replaced]
+                old_file = self._rewrite(keep, vectors)
+            else:
+                # Vectors appended by a write that died before its sidecar was
+                # saved are orphans; drop them so the new rows line up
+                row_bytes = self._dimensions * np.dtype(np.float32).itemsize
+                with open(os.path.join(self.persist_directory, self._vector_file), "r+b") as f:
+                    f.truncate(len(self._rows) * row_bytes)
+                    f.seek(0, os.SEEK_END)
+                    f.write(vectors.tobytes())
+            self._rows = self._rows + new_rows
+            self._save_sidecar()
+            self._remove_vector_file(old_file)
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        with self._lock:
+            self._refresh()
+            doomed = {self._row_by_id[i] for i in ids or [] if i in self._row_by_id}
+            if not doomed:
+                return True
+            old_file = self._rewrite(
+                [index for index in range(len(self._rows)) if index not in doomed]
+            )
+            self._save_sidecar()
+            self._remove_vector_file(old_file)
+        return True
+
+    def similarity_search(
+        self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vectors(
+            [self._embedding_function.embed_query(query)], k, filter
+        )[0]
+
+    def similarity_search_by_vectors(
+        self, vectors: List[List[float]], k: int, filter: Optional[dict] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        """Top k (document, cosine distance) pairs for each query vector
+
+        filter is a Chroma-style `where` on metadata; only matching rows are
+        scored.
+        """
+        with self._lock:
+            self._refresh()
+            matrix, rows = self._matrix, self._rows
+        if matrix is None or not rows:
+            return [[] for _ in vectors]
+
+        if filter:
+            row_numbers = np.array(
+                [index for index, row in enumerate(rows) if matches(row["metadata"], filter)],
+                dtype=np.intp,
+            )
+            if not len(row_numbers):
+                return [[] for _ in vectors]
+            matrix = matrix[row_numbers]
+        else:
+            row_numbers = np.arange(len(rows))
+
+        queries = normalize(np.asarray(vectors, dtype=np.float32))
+        scores = queries @ matrix.T
+        k = min(k, len(row_numbers))
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for query_scores, candidates in zip(scores, top):
+            ranked = candidates[np.argsort(-query_scores[candidates], kind="stable")]
+            results.append(
+                [
+                    (
+                        Document(
+                            page_content=rows[row_numbers[index]]["page_content"],
+                            metadata=rows[row_numbers[index]]["metadata"],
+                            id=rows[row_numbers[index]]["id"],
+                        ),
+                        float(1.0 - query_scores[index]),
+                    )
+                    for index in ranked
+                ]
+            )
+        return results
+
+    def get(self) -> dict:
+        """All IDs, texts and metadata, in the shape of Chroma's get()"""
+        with self._lock:
+            self._refresh()
+            rows = self._rows
+        return {
+            "ids": [row["id"] for row in rows],
+            "documents": [row["page_content"] for row in rows],
+            "metadatas": [row["metadata"] for row in rows],
+        }
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        persist_directory: str = None,
+        collection_name: str = "knowledge_base",
+        **kwargs: Any,
+    ) -> "NumpyVectorStore":
+        store = cls(persist_directory, embedding, collection_name)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
+
+    def _remove_vector_file(self, name: Optional[str]) -> None:
+        if name:
+            try:
+                os.remove(os.path.join(self.persist_directory, name))
+            except FileNotFoundError:
+                pass
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return (vectors / np.where(norms == 0, 1.0, norms)).astype(np.float32, copy=False)
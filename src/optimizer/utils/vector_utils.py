@@ -1,7 +1,35 @@
-from langchain_openai import OpenAIEmbeddings
 from langchain_chroma import Chroma
+from langchain_core.documents import Document
+from contextlib import contextmanager
+import fcntl
+import glob
+import json
 import os
+import re
 import shutil
+import threading
+import uuid
+from optimizer.utils.embedding_cache import CachedEmbeddings, get_embedding_cache
+from optimizer.utils.embedding_backends import create_embeddings, embedding_model_id
+from optimizer.utils.numpy_store import NumpyVectorStore, is_valid_numpy_vector_db
+
+VERSION_STAMP_NAME = ".kb-version"
+INDEX_MANIFEST_NAME = ".kb-manifest.json"
+CHUNK_STORE_SIZE = 1_000_000
+# Published snapshots kept on disk: the live one and the one before it, which
+# readers that opened it before the last swap may still be using
+KEPT_SNAPSHOTS = 2
+
+# Vector store classes selectable through RagSettings.vector_store; all take
+# (persist_directory, embedding_function, collection_name)
+VECTOR_STORES = {
+    "chroma": Chroma,
+    "numpy": NumpyVectorStore,
+}
+
+# Process-wide vector store handles, keyed by (real DB path, collection, embedding model)
+_vector_db_handles = {}
+_vector_db_handles_lock = threading.Lock()
 
 
 def is_valid_chroma_vector_db(path: str) -> bool:
@@ -24,23 +52,280 @@ def is_valid_chroma_vector_db(path: str) -> bool:
     return all(os.path.exists(os.path.join(path, f)) for f in legacy_files)
 
 
+def is_valid_vector_db(path: str, vector_store: str, collection_name: str) -> bool:
+    """Check if a directory holds a vector DB of the given store type."""
+    if vector_store == "numpy":
+        return is_valid_numpy_vector_db(path, collection_name)
+    return is_valid_chroma_vector_db(path)
+
+
 def delete_vector_db(path: str) -> None:
-    """Delete the vector DB directory (use with caution)."""
-    if os.path.exists(path):
+    """Delete the vector DB directory, or the link and its snapshots (use with caution)."""
+    if os.path.islink(path):
+        print(f"🧨 Deleting vector DB at {path}")
+        invalidate_vector_db()
+        os.remove(path)
+        for snapshot in _snapshot_paths(path):
+            shutil.rmtree(snapshot, ignore_errors=True)
+    elif os.path.exists(path):
         print(f"🧨 Deleting vector DB at {path}")
+        invalidate_vector_db(path)
         shutil.rmtree(path)
     else:
         print(f"⚠️ Vector DB path does not exist: {path}")
 
 
-def get_chroma_vector_db(vector_db_abspath: str, collection_name: str) -> Chroma:
+def staging_path(vector_db_abspath: str) -> str:
+    """Directory a build writes to before it is published at vector_db_abspath."""
+    parent, name = os.path.split(os.path.abspath(vector_db_abspath))
+    return os.path.join(parent, f".{name}.staging")
+
+
+def _snapshot_name(name: str) -> re.Pattern:
+    """Snapshot names `.<name>-<sequence>-<version>`, and `.<name>-<version>` from older builds
+
+    Exact, so the snapshots of a sibling DB such as `<name>-test` never match.
+    """
+    return re.compile(rf"\.{re.escape(name)}-(?:\d+-)?[0-9a-f]{{32}}")
+
+
+def _snapshot_paths(vector_db_abspath: str) -> list:
+    parent, name = os.path.split(os.path.abspath(vector_db_abspath))
+    pattern = _snapshot_name(name)
+    return [
+        path
+        for path in glob.glob(os.path.join(glob.escape(parent), f".{glob.escape(name)}-*"))
+        if pattern.fullmatch(os.path.basename(path)) and os.path.isdir(path)
+    ]
+
+
+def _snapshot_sequence(snapshot_abspath: str) -> int:
+    """Publication number from a `.<name>-<sequence>-<version>` snapshot name (0 if none)"""
+    parts = os.path.basename(snapshot_abspath).rsplit("-", 2)
+    return int(parts[1]) if len(parts) == 3 and parts[1].isdigit() else 0
+
+
+@contextmanager
+def build_lock(vector_db_abspath: str, wait: bool = True):
+    """Hold an exclusive lock on building the vector DB, across processes.
+
+    Yields True once the lock is held. If another process holds it and wait
+    is false, yields False immediately instead.
+    """
+    parent, name = os.path.split(os.path.abspath(vector_db_abspath))
+    os.makedirs(parent, exist_ok=True)
+    with open(os.path.join(parent, f".{name}.lock"), "w") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            if not wait:
+                yield False
+                return
+            print("⏳ Waiting for another knowledge base build to finish...")
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def publish_snapshot(staging_abspath: str, vector_db_abspath: str) -> str:
+    """Atomically make a finished staging directory the live vector DB.
+
+    The staging directory becomes a snapshot next to the DB path, and the
+    DB path becomes a symlink to it, swapped in with one rename. Processes
+    that already opened the previous snapshot keep reading it; everything
+    opened afterwards sees the new one. Snapshot names start with a sequence
+    number, so they can be ordered by publication (directory mtimes change
+    whenever a reader's SQLite creates files in them). The new and previous
+    snapshots are always kept, and older ones beyond KEPT_SNAPSHOTS are
+    deleted. Call while holding build_lock(). Returns the new version stamp.
+    """
+    version = write_version_stamp(staging_abspath)
+    invalidate_vector_db(staging_abspath)
+
+    parent, name = os.path.split(os.path.abspath(vector_db_abspath))
+    sequence = max(map(_snapshot_sequence, _snapshot_paths(vector_db_abspath)), default=0)
+    previous = None
+    if os.path.islink(vector_db_abspath):
+        previous = os.path.realpath(vector_db_abspath)
+    elif os.path.isdir(vector_db_abspath):
+        # A DB built before snapshots existed becomes the previous snapshot
+        sequence += 1
+        previous = os.path.join(parent, f".{name}-{sequence:06d}-{uuid.uuid4().hex}")
+        os.rename(vector_db_abspath, previous)
+    snapshot = os.path.join(parent, f".{name}-{sequence + 1:06d}-{version}")
+    os.rename(staging_abspath, snapshot)
+
+    tmp_link = f"{vector_db_abspath}.{os.getpid()}.tmp"
+    os.symlink(os.path.basename(snapshot), tmp_link)
+    os.replace(tmp_link, vector_db_abspath)
+
+    kept = {snapshot, previous}
+    older = sorted(
+        (path for path in _snapshot_paths(vector_db_abspath) if path not in kept),
+        key=_snapshot_sequence,
+        reverse=True,
+    )
+    for old in older[max(KEPT_SNAPSHOTS - 2, 0):]:
+        invalidate_vector_db(old)
+        shutil.rmtree(old, ignore_errors=True)
+    return version
+
+
+def get_chroma_vector_db(
+    vector_db_abspath: str,
+    collection_name: str,
+    embedding_model: str = "text-embedding-ada-002",
+    embedding_backend: str = "openai",
+) -> Chroma:
     return Chroma(
         persist_directory=vector_db_abspath,
-        embedding_function=OpenAIEmbeddings(),
+        embedding_function=create_embeddings(embedding_backend, embedding_model),
         collection_name=collection_name,
     )
 
 
+def get_shared_vector_db(
+    vector_db_abspath: str,
+    collection_name: str,
+    embedding_model: str,
+    embedding_cache_path: str = None,
+    embedding_store_path: str = None,
+    embedding_backend: str = "openai",
+    vector_store: str = "chroma",
+):
+    """Return a vector store handle shared by every caller in this process.
+
+    Opening the store (for Chroma, a persistent client's SQLite open and
+    collection lookup) and creating an embeddings client is paid once per
+    (path, collection, store, backend, model) instead of once per query. Query embeddings go through an EmbeddingCache,
+    persisted at embedding_cache_path if given; document embeddings are
+    reused from the chunk store at embedding_store_path if given. Handles
+    are keyed by the resolved path, so a published snapshot gets a fresh
+    handle; call invalidate_vector_db() after a DB is changed in place.
+    """
+    key = (
+        os.path.realpath(vector_db_abspath),
+        collection_name,
+        vector_store,
+        embedding_backend,
+        embedding_model,
+        embedding_cache_path,
+        embedding_store_path,
+    )
+    with _vector_db_handles_lock:
+        handle = _vector_db_handles.get(key)
+        if handle is None:
+            # Forget handles on snapshots this path pointed to before a swap
+            parent, name = os.path.split(os.path.abspath(vector_db_abspath))
+            parent, pattern = os.path.realpath(parent), _snapshot_name(name)
+            for stale in [
+                k
+                for k in _vector_db_handles
+                if k[0] != key[0]
+                and os.path.dirname(k[0]) == parent
+                and pattern.fullmatch(os.path.basename(k[0]))
+            ]:
+                del _vector_db_handles[stale]
+            # Opened at the resolved path, so the handle stays on its
+            # snapshot and chromadb's per-path client is not reused across swaps
+            handle = VECTOR_STORES[vector_store](
+                persist_directory=key[0],
+                embedding_function=CachedEmbeddings(
+                    create_embeddings(embedding_backend, embedding_model),
+                    embedding_model_id(embedding_backend, embedding_model),
+                    cache=get_embedding_cache(embedding_cache_path),
+                    document_cache=get_chunk_embedding_store(embedding_store_path),
+                ),
+                collection_name=collection_name,
+            )
+            _vector_db_handles[key] = handle
+        return handle
+
+
+def similarity_search_many(vectorstore, queries: list, k: int, filter: dict = None) -> list:
+    """Top k documents for each query, embedding all queries in one request.
+
+    filter is a Chroma `where` on chunk metadata, applied before ranking.
+    """
+    embeddings = vectorstore.embeddings
+    if hasattr(embeddings, "embed_queries"):
+        vectors = embeddings.embed_queries(queries)
+    else:
+        vectors = [embeddings.embed_query(query) for query in queries]
+
+    if isinstance(vectorstore, NumpyVectorStore):
+        results = vectorstore.similarity_search_by_vectors(vectors, k, filter)
+        return [[doc for doc, _ in docs] for docs in results]
+
+    # langchain_chroma has no multi-query search; the collection answers
+    # every query embedding in one call
+    response = vectorstore._collection.query(
+        query_embeddings=vectors, n_results=k, where=filter, include=["documents", "metadatas"]
+    )
+    return [
+        [
+            Document(page_content=text, metadata=metadata or {}, id=chunk_id)
+            for text, metadata, chunk_id in zip(texts, metadatas, ids)
+            if text is not None
+        ]
+        for texts, metadatas, ids in zip(
+            response["documents"], response["metadatas"], response["ids"]
+        )
+    ]
+
+
+def get_chunk_embedding_store(path: str = None):
+    """Content-addressed store of chunk embeddings, or None without a path."""
+    if not path:
+        return None
+    return get_embedding_cache(path, memory_size=0, max_disk_entries=CHUNK_STORE_SIZE)
+
+
+def invalidate_vector_db(vector_db_abspath: str = None) -> None:
+    """Drop shared handles for a vector DB path (or all of them if no path)."""
+    path = os.path.realpath(vector_db_abspath) if vector_db_abspath else None
+    with _vector_db_handles_lock:
+        for key in list(_vector_db_handles):
+            if path is None or key[0] == path:
+                del _vector_db_handles[key]
+
+    # chromadb keeps one client system per path; a rebuilt DB needs a fresh one
+    from chromadb.api.client import SharedSystemClient
+
+    SharedSystemClient.clear_system_cache()
+
+
+def write_version_stamp(vector_db_abspath: str) -> str:
+    """Record that the collection changed; returns the new version."""
+    version = uuid.uuid4().hex
+    stamp_file = os.path.join(vector_db_abspath, VERSION_STAMP_NAME)
+    tmp_file = f"{stamp_file}.{os.getpid()}.tmp"
+    with open(tmp_file, "w") as f:
+        f.write(version)
+    os.replace(tmp_file, stamp_file)
+    return version
+
+
+def read_version_stamp(vector_db_abspath: str):
+    """Return the version written by the last build, or None if there is none."""
+    try:
+        with open(os.path.join(vector_db_abspath, VERSION_STAMP_NAME)) as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def read_index_manifest(vector_db_abspath: str):
+    """Return the embedder's manifest of indexed files, or None if there is none."""
+    try:
+        with open(os.path.join(vector_db_abspath, INDEX_MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
 def print_vector_db_info(path: str) -> None:
     """Prints basic info about the vector DB state."""
     print(f"🔍 Checking vector DB at: {path}")
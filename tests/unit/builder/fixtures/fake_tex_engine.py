@@ -0,0 +1,28 @@
+"""Stand-in for pdflatex used by the PDF stage tests
+
+Writes <stem>.aux, <stem>.log and <stem>.pdf into -output-directory. The .aux
+content changes on each run until it has been written FAKE_TEX_AUX_RUNS times,
+mimicking a document that needs reruns to settle its references. A .tex file
+containing "FAIL" makes the engine exit with status 1.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+output_dir = Path(next(a.split("=", 1)[1] for a in sys.argv if a.startswith("-output-directory=")))
+tex_path = Path(sys.argv[-1])
+stem = tex_path.stem
+source = tex_path.read_text()
+
+aux = output_dir / f"{stem}.aux"
+runs = aux.read_text().count("\n") if aux.exists() else 0
+settle_after = int(os.environ.get("FAKE_TEX_AUX_RUNS", "2"))
+if runs < settle_after:
+    with open(aux, "a") as f:
+        f.write(f"run {runs + 1}\n")
+
+(output_dir / f"{stem}.log").write_text(f"fake engine run for {tex_path.name}\n")
+if "FAIL" in source:
+    sys.exit(1)
+(output_dir / f"{stem}.pdf").write_text(f"PDF of {source}")
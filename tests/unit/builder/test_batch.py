@@ -0,0 +1,78 @@
+import json
+import shutil
+import pytest
+from pathlib import Path
+from builder.batch import build_batch, collect_inputs
+from builder.builder import build_cv
+from builder.template_env import get_tex_env
+
+ROOT = Path(__file__).parent.parent.parent.parent
+TEMPLATES = str(ROOT / "templates")
+
+
+@pytest.fixture
+def inputs_dir(tmp_path):
+    inputs = tmp_path / "inputs"
+    inputs.mkdir()
+    shutil.copy(ROOT / "data" / "cv.yaml", inputs / "cv.yaml")
+    shutil.copy(ROOT / "data" / "backend-dev-cv.json", inputs / "backend.json")
+    (inputs / "broken.json").write_text(json.dumps({"name": "Nobody"}))
+    (inputs / "notes.txt").write_text("not an input")
+    return inputs
+
+
+@pytest.mark.unit
+def test_collect_inputs_from_directory_skips_other_files(inputs_dir):
+    names = [p.name for p in collect_inputs(str(inputs_dir))]
+    assert names == ["backend.json", "broken.json", "cv.yaml"]
+
+
+@pytest.mark.unit
+def test_collect_inputs_from_manifest(inputs_dir):
+    manifest = inputs_dir / "manifest.txt"
+    manifest.write_text("# variants\ncv.yaml\n\nbackend.json\n")
+    assert collect_inputs(str(manifest)) == [inputs_dir / "cv.yaml", inputs_dir / "backend.json"]
+
+
+@pytest.mark.unit
+def test_build_batch_rejects_inputs_with_the_same_output(inputs_dir, tmp_path):
+    (inputs_dir / "other").mkdir()
+    shutil.copy(inputs_dir / "backend.json", inputs_dir / "other" / "cv.json")
+    manifest = inputs_dir / "manifest.txt"
+    manifest.write_text("cv.yaml\nother/cv.json\n")
+
+    with pytest.raises(ValueError, match="rename one of them"):
+        build_batch(
+            str(manifest),
+            str(tmp_path / "out"),
+            template_dir=TEMPLATES,
+            cache_dir=None,
+            input_cache_dir=None,
+        )
+    assert not (tmp_path / "out" / "cv.tex").exists()
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("workers, fragments", [(1, False), (2, False), (1, True)])
+def test_build_batch_reports_failures_without_stopping(inputs_dir, tmp_path, workers, fragments):
+    output_dir = tmp_path / "out"
+    results = build_batch(
+        str(inputs_dir),
+        str(output_dir),
+        workers=workers,
+        template_dir=TEMPLATES,
+        fragments=fragments,
+        cache_dir=None,
+        input_cache_dir=str(tmp_path / "input-cache"),
+    )
+
+    by_name = {Path(r.input_file).name: r for r in results}
+    assert by_name["cv.yaml"].ok and by_name["backend.json"].ok
+    assert not by_name["broken.json"].ok
+    assert "ValidationError" in by_name["broken.json"].error
+    assert all(r.seconds >= 0 for r in results)
+
+    expected = tmp_path / "expected.tex"
+    env = get_tex_env(TEMPLATES, cache_dir=None)
+    build_cv(str(inputs_dir / "cv.yaml"), str(expected), env=env, input_cache_dir=None)
+    assert (output_dir / "cv.tex").read_text() == expected.read_text()
@@ -0,0 +1,89 @@
+import re
+import sys
+import pytest
+from pathlib import Path
+import builder.builder
+from builder.cli import main_cv
+from builder.builder import load_data, render_cv, render_cover_letter
+from builder.template_env import escape_tex, escape_tree, get_tex_env, TEX_REPLACEMENTS
+
+ROOT = Path(__file__).parent.parent.parent.parent
+TEMPLATES = str(ROOT / "templates")
+
+
+def regex_escape_tex(text):
+    pattern = re.compile("|".join(re.escape(key) for key in TEX_REPLACEMENTS))
+    return pattern.sub(lambda match: TEX_REPLACEMENTS[match.group()], text)
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "text",
+    ["plain", "R&D 100% $5 #1 snake_case {x} ~ ^ \\", "\\textbf{a}", "~~^^", ""],
+)
+def test_escape_tex_matches_regex_escaper(text):
+    assert escape_tex(text) == regex_escape_tex(text)
+
+
+@pytest.mark.unit
+def test_escape_tex_passes_non_strings_through():
+    assert escape_tex(None) is None
+    assert escape_tex(3) == 3
+
+
+@pytest.mark.unit
+def test_escape_tree_escapes_nested_strings():
+    tree = {"a": "x&y", "b": [{"c": "50%"}, None, 2]}
+    assert escape_tree(tree) == {"a": r"x\&y", "b": [{"c": r"50\%"}, None, 2]}
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "template_name, input_file, render",
+    [
+        ("cv.tex", "data/cv.yaml", render_cv),
+        ("cv.tex", "data/backend-dev-cv.json", render_cv),
+        ("cv.tex", "data/library-cv.json", render_cv),
+        ("cover-letter.tex", "data/cover-letter.json", render_cover_letter),
+    ],
+)
+def test_pre_escaped_render_is_byte_identical(template_name, input_file, render):
+    data = load_data(str(ROOT / input_file))
+    data["name"] += " & Sons_{#1} 100% ~^\\"
+
+    expected = render(data, get_tex_env(TEMPLATES, cache_dir=None).get_template(template_name))
+    pre_escaped = get_tex_env(TEMPLATES, cache_dir=None, pre_escaped=True).get_template(
+        template_name
+    )
+
+    assert render(data, pre_escaped) == expected
+
+
+@pytest.mark.unit
+def test_explicit_escape_tex_filter_does_not_double_escape_pre_escaped_data():
+    env = get_tex_env(TEMPLATES, cache_dir=None, pre_escaped=True)
+    template = env.from_string(r"\textbf{(( name|escape_tex ))}")
+
+    assert template.render(escape_tree({"name": "R&D 100%"})) == r"\textbf{R\&D 100\%}"
+
+
+@pytest.mark.unit
+def test_pre_escape_flag_reaches_single_file_builds(tmp_path, monkeypatch):
+    envs = []
+
+    def tex_env(template_dir="templates", cache_dir=None, pre_escaped=False):
+        envs.append(pre_escaped)
+        return get_tex_env(TEMPLATES, cache_dir=None, pre_escaped=pre_escaped)
+
+    output_file = tmp_path / "cv.tex"
+    monkeypatch.setattr(builder.builder, "get_tex_env", tex_env)
+    argv = ["build-cv", str(ROOT / "data" / "cv.yaml"), str(output_file), "--pre-escape"]
+    monkeypatch.setattr(sys, "argv", argv + ["--input-cache-dir", str(tmp_path / "input-cache")])
+    main_cv()
+
+    expected = render_cv(
+        load_data(str(ROOT / "data" / "cv.yaml")),
+        get_tex_env(TEMPLATES, cache_dir=None).get_template("cv.tex"),
+    )
+    assert envs == [True]
+    assert output_file.read_text() == expected
@@ -0,0 +1,73 @@
+import pytest
+from pathlib import Path
+from builder.builder import load_data, render_cover_letter
+from builder.fanout import FanOutSpec, fan_out_cover_letters
+from builder.template_env import get_tex_env
+from models.schema import CoverLetter
+
+ROOT = Path(__file__).parent.parent.parent.parent
+
+
+@pytest.fixture
+def cover_letter():
+    return CoverLetter(**load_data(str(ROOT / "data" / "cover-letter.json"))).model_dump()
+
+
+@pytest.fixture
+def template():
+    return get_tex_env(str(ROOT / "templates"), cache_dir=None).get_template("cover-letter.tex")
+
+
+@pytest.mark.unit
+def test_each_target_matches_a_single_render(cover_letter, template, tmp_path):
+    spec = FanOutSpec(
+        targets=[
+            {"company": "Acme & Sons", "position": "Engineer"},
+            {"company": "FrobozzCo", "position": "Grue Wrangler"},
+        ]
+    )
+    outputs = list(fan_out_cover_letters(cover_letter, spec, template, str(tmp_path)))
+    assert [Path(p).name for p in outputs] == [
+        "acme-sons-engineer.tex",
+        "frobozzco-grue-wrangler.tex",
+    ]
+
+    expected = render_cover_letter(
+        {**cover_letter, "company": "Acme & Sons", "position": "Engineer"}, template
+    )
+    assert Path(outputs[0]).read_text() == expected
+    assert "xXcompany" not in expected
+
+
+@pytest.mark.unit
+def test_variants_swap_in_alternate_paragraphs(cover_letter, template, tmp_path):
+    spec = FanOutSpec(
+        targets=[{"company": "Acme", "position": "Engineer"}],
+        variants=[{}, {"1": 0}],
+    )
+    base, variant = fan_out_cover_letters(cover_letter, spec, template, str(tmp_path))
+    alternate_start = cover_letter["alternate_paragraphs"][0][:40]
+    assert alternate_start not in Path(base).read_text()
+    assert alternate_start in Path(variant).read_text()
+
+
+@pytest.mark.unit
+def test_rendering_is_lazy_and_validates_variants(cover_letter, template, tmp_path):
+    spec = FanOutSpec(targets=[{"company": "Acme", "position": "Engineer"}], variants=[{0: 5}])
+    outputs = fan_out_cover_letters(cover_letter, spec, template, str(tmp_path / "out"))
+    assert not (tmp_path / "out").exists()
+    with pytest.raises(ValueError):
+        next(outputs)
+
+
+@pytest.mark.unit
+def test_targets_with_the_same_slug_are_rejected_before_writing(cover_letter, template, tmp_path):
+    spec = FanOutSpec(
+        targets=[
+            {"company": "Acme, Inc.", "position": "Engineer"},
+            {"company": "Acme Inc", "position": "Engineer"},
+        ]
+    )
+    with pytest.raises(ValueError, match="acme-inc-engineer.tex"):
+        next(fan_out_cover_letters(cover_letter, spec, template, str(tmp_path / "out")))
+    assert not (tmp_path / "out").exists()
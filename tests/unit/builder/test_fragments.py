@@ -0,0 +1,51 @@
+import copy
+import pytest
+from pathlib import Path
+from builder.builder import load_data, render_cv
+from builder.fragments import FragmentCache
+from builder.template_env import get_tex_env
+from models.schema import CurriculumVitae
+
+ROOT = Path(__file__).parent.parent.parent.parent
+
+
+@pytest.fixture
+def template():
+    return get_tex_env(str(ROOT / "templates"), cache_dir=None).get_template("cv.tex")
+
+
+def load_cv(name):
+    return CurriculumVitae(**load_data(str(ROOT / "data" / name))).model_dump()
+
+
+@pytest.mark.unit
+def test_block_dependencies_are_found_statically(template):
+    dependencies = FragmentCache().block_dependencies(template)
+    assert dependencies["header"] == {"name", "contact"}
+    assert dependencies["profession"] == {"profession", "core_expertise"}
+    assert dependencies["experience"] == {"experience"}
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("name", ["cv.yaml", "backend-dev-cv.json", "library-cv.json"])
+def test_fragment_render_is_byte_identical(template, name):
+    cv = load_cv(name)
+    fragments = FragmentCache()
+    assert render_cv(cv, template, validated=True, fragments=fragments) == template.render(cv)
+    assert render_cv(cv, template, validated=True, fragments=fragments) == template.render(cv)
+    assert fragments.misses == fragments.hits == len(fragments.block_dependencies(template))
+
+
+@pytest.mark.unit
+def test_variant_only_rerenders_changed_sections(template):
+    base = load_cv("cv.yaml")
+    variant = copy.deepcopy(base)
+    variant["summary_of_qualifications"] = ["Rewritten summary & more"]
+    variant["core_expertise"].insert(0, "PHP")
+
+    fragments = FragmentCache()
+    render_cv(base, template, validated=True, fragments=fragments)
+    fragments.hits = fragments.misses = 0
+
+    assert render_cv(variant, template, validated=True, fragments=fragments) == template.render(variant)
+    assert fragments.misses == 2
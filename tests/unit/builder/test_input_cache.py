@@ -0,0 +1,55 @@
+import json
+import shutil
+import pytest
+from pathlib import Path
+from pydantic import BaseModel, ValidationError
+from builder import input_cache
+from builder.input_cache import load_validated
+from models.schema import CurriculumVitae
+
+ROOT = Path(__file__).parent.parent.parent.parent
+
+
+@pytest.fixture
+def cv_yaml(tmp_path):
+    path = tmp_path / "cv.yaml"
+    shutil.copy(ROOT / "data" / "cv.yaml", path)
+    return path
+
+
+@pytest.mark.unit
+def test_cache_hit_skips_parsing_and_validation(cv_yaml, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    first = load_validated(str(cv_yaml), CurriculumVitae, cache_dir)
+    assert first == CurriculumVitae(**input_cache.parse_data(cv_yaml.read_bytes(), ".yaml")).model_dump()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cache miss")
+
+    monkeypatch.setattr(input_cache, "parse_data", fail)
+    assert load_validated(str(cv_yaml), CurriculumVitae, cache_dir) == first
+
+
+@pytest.mark.unit
+def test_content_and_schema_changes_miss_the_cache(cv_yaml, tmp_path):
+    cache_dir = tmp_path / "cache"
+    load_validated(str(cv_yaml), CurriculumVitae, str(cache_dir))
+
+    cv_yaml.write_text(cv_yaml.read_text().replace("Oakland", "Berkeley"))
+    assert load_validated(str(cv_yaml), CurriculumVitae, str(cache_dir))["contact"]["city"] == "Berkeley"
+    assert len(list(cache_dir.iterdir())) == 1
+
+    class NameOnly(BaseModel):
+        name: str
+
+    assert load_validated(str(cv_yaml), NameOnly, str(cache_dir)) == {"name": "Wesley Hinkle"}
+    assert len(list(cache_dir.iterdir())) == 2
+
+
+@pytest.mark.unit
+def test_invalid_data_is_not_cached(tmp_path):
+    path = tmp_path / "bad.json"
+    path.write_text(json.dumps({"name": "Nobody"}))
+    with pytest.raises(ValidationError):
+        load_validated(str(path), CurriculumVitae, str(tmp_path / "cache"))
+    assert not (tmp_path / "cache").exists()
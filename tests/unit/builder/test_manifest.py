@@ -0,0 +1,80 @@
+import os
+import shutil
+import pytest
+from pathlib import Path
+from builder.batch import build_batch
+from builder.builder import build_cv
+from builder.template_env import get_tex_env
+
+ROOT = Path(__file__).parent.parent.parent.parent
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    shutil.copytree(ROOT / "templates", tmp_path / "templates")
+    shutil.copy(ROOT / "data" / "cv.yaml", tmp_path / "cv.yaml")
+    (tmp_path / "out").mkdir()
+    return tmp_path
+
+
+def build(workspace, force=False):
+    env = get_tex_env(str(workspace / "templates"), cache_dir=None)
+    return build_cv(
+        str(workspace / "cv.yaml"),
+        str(workspace / "out" / "cv.tex"),
+        env=env,
+        force=force,
+        input_cache_dir=None,
+    )
+
+
+@pytest.mark.unit
+def test_unchanged_inputs_skip_rebuild(workspace):
+    assert build(workspace) is True
+    assert build(workspace) is False
+    assert build(workspace, force=True) is True
+
+
+@pytest.mark.unit
+def test_input_or_template_change_triggers_rebuild(workspace):
+    build(workspace)
+
+    with open(workspace / "cv.yaml", "a") as f:
+        f.write("\n# trailing comment\n")
+    output = workspace / "out" / "cv.tex"
+    os.utime(output, (0, 0))
+    assert build(workspace) is False, "identical render must not rewrite the output"
+    assert output.stat().st_mtime == 0
+
+    with open(workspace / "templates" / "cv.tex", "a") as f:
+        f.write("% edited\n")
+    assert build(workspace) is True
+    assert "% edited" in output.read_text()
+
+
+@pytest.mark.unit
+def test_edited_output_is_rebuilt(workspace):
+    build(workspace)
+    (workspace / "out" / "cv.tex").write_text("hand edited")
+    assert build(workspace) is True
+
+
+@pytest.mark.unit
+def test_batch_skips_current_outputs(workspace):
+    inputs = workspace / "inputs"
+    inputs.mkdir()
+    shutil.copy(workspace / "cv.yaml", inputs / "a.yaml")
+    shutil.copy(workspace / "cv.yaml", inputs / "b.yaml")
+    args = (str(inputs), str(workspace / "batch"))
+    kwargs = dict(
+        workers=1, template_dir=str(workspace / "templates"), cache_dir=None, input_cache_dir=None
+    )
+
+    assert [r.skipped for r in build_batch(*args, **kwargs)] == [False, False]
+
+    (inputs / "b.yaml").write_text((inputs / "b.yaml").read_text().replace("Oakland", "Berkeley"))
+    results = build_batch(*args, **kwargs)
+    assert [r.skipped for r in results] == [True, False]
+    assert all(r.ok for r in results)
+
+    assert [r.skipped for r in build_batch(*args, force=True, **kwargs)] == [False, False]
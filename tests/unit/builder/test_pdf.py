@@ -0,0 +1,54 @@
+import sys
+import pytest
+from pathlib import Path
+from builder.pdf import compile_pdf, compile_pdfs, needs_compile
+
+FAKE_ENGINE = [sys.executable, str(Path(__file__).parent / "fixtures" / "fake_tex_engine.py")]
+
+
+@pytest.fixture
+def tex_files(tmp_path):
+    paths = []
+    for name in ("a", "b", "c"):
+        path = tmp_path / f"{name}.tex"
+        path.write_text(f"document {name}")
+        paths.append(str(path))
+    return paths
+
+
+@pytest.mark.unit
+def test_reruns_until_aux_settles_then_reuses_build_dir(tex_files, tmp_path):
+    result = compile_pdf(tex_files[0], engine=FAKE_ENGINE)
+    assert result.ok, result.error
+    assert result.runs == 3
+    assert Path(result.pdf_file).read_text() == "PDF of document a"
+    assert (tmp_path / ".build" / "a" / "a.aux").exists()
+    assert "fake engine run" in result.log
+
+    assert compile_pdf(tex_files[0], engine=FAKE_ENGINE).runs == 1
+
+
+@pytest.mark.unit
+def test_max_runs_bounds_reruns(tex_files, monkeypatch):
+    monkeypatch.setenv("FAKE_TEX_AUX_RUNS", "10")
+    assert compile_pdf(tex_files[0], engine=FAKE_ENGINE, max_runs=2).runs == 2
+
+
+@pytest.mark.unit
+def test_compile_pdfs_isolates_jobs_and_reports_failures(tex_files, tmp_path):
+    Path(tex_files[1]).write_text("FAIL")
+    results = compile_pdfs(tex_files, engine=FAKE_ENGINE, workers=3)
+
+    assert [r.ok for r in results] == [True, False, True]
+    assert "status 1" in results[1].error
+    assert results[1].log
+    assert sorted(p.name for p in (tmp_path / ".build").iterdir()) == ["a", "b", "c"]
+    assert not needs_compile(tex_files[0], str(tmp_path / "a.pdf"))
+    assert needs_compile(tex_files[1], str(tmp_path / "b.pdf"))
+
+
+@pytest.mark.unit
+def test_missing_engine_is_reported(tex_files):
+    result = compile_pdf(tex_files[0], engine=["no-such-tex-engine"])
+    assert not result.ok
+    assert result.runs == 0
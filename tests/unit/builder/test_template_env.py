@@ -0,0 +1,50 @@
+import pytest
+from jinja2 import FileSystemLoader
+from builder.template_env import get_tex_env, TexBytecodeCache, TexEnvironment, TEX_DELIMITERS
+
+
+@pytest.fixture
+def template_dir(tmp_path):
+    templates = tmp_path / "templates"
+    templates.mkdir()
+    (templates / "doc.tex").write_text(r"\textbf{(( name ))}")
+    return templates
+
+
+@pytest.mark.unit
+def test_compiled_templates_are_persisted_and_reused(template_dir, tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    # An entry written before keys started with a template id
+    (cache_dir / f"__jinja2_{'0' * 40}.cache").write_bytes(b"")
+    get_tex_env(str(template_dir), str(cache_dir)).get_template("doc.tex")
+    assert len(list(cache_dir.iterdir())) == 1
+
+    template = get_tex_env(str(template_dir), str(cache_dir)).get_template("doc.tex")
+    assert template.render(name="R&D") == r"\textbf{R\&D}"
+    assert len(list(cache_dir.iterdir())) == 1
+
+
+@pytest.mark.unit
+def test_cache_key_changes_with_content_and_delimiters(template_dir, tmp_path):
+    cache_dir = tmp_path / "cache"
+    get_tex_env(str(template_dir), str(cache_dir)).get_template("doc.tex")
+
+    (template_dir / "doc.tex").write_text(r"\emph{(( name ))}")
+    template = get_tex_env(str(template_dir), str(cache_dir)).get_template("doc.tex")
+    assert template.render(name="x") == r"\emph{x}"
+    # The entry for the old content is replaced, not kept alongside
+    assert len(list(cache_dir.iterdir())) == 1
+
+    env = TexEnvironment(
+        loader=FileSystemLoader(str(template_dir)),
+        bytecode_cache=TexBytecodeCache(str(cache_dir)),
+        **{**TEX_DELIMITERS, "variable_start_string": "<<", "variable_end_string": ">>"},
+    )
+    assert env.get_template("doc.tex").render(name="x") == r"\emph{(( name ))}"
+    assert len(list(cache_dir.iterdir())) == 2
+
+
+@pytest.mark.unit
+def test_cache_can_be_disabled(template_dir):
+    assert get_tex_env(str(template_dir), cache_dir=None).bytecode_cache is None
@@ -0,0 +1,88 @@
+import shutil
+import threading
+import time
+import pytest
+from pathlib import Path
+from builder.watch import WatchJob, affected_jobs, watch
+
+ROOT = Path(__file__).parent.parent.parent.parent
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    shutil.copytree(ROOT / "templates", tmp_path / "templates")
+    (tmp_path / "data").mkdir()
+    shutil.copy(ROOT / "data" / "cv.yaml", tmp_path / "data" / "cv.yaml")
+    shutil.copy(ROOT / "data" / "cv.yaml", tmp_path / "data" / "other.yaml")
+    shutil.copy(ROOT / "data" / "cover-letter.json", tmp_path / "data" / "letter.json")
+    return tmp_path
+
+
+@pytest.fixture
+def jobs(workspace):
+    data = workspace / "data"
+    return [
+        WatchJob("cv", str(data / "cv.yaml"), str(workspace / "cv.tex")),
+        WatchJob("cv", str(data / "other.yaml"), str(workspace / "other.tex")),
+        WatchJob("cover-letter", str(data / "letter.json"), str(workspace / "letter.tex")),
+    ]
+
+
+@pytest.mark.unit
+def test_input_change_affects_only_its_job(workspace, jobs):
+    changed = [str(workspace / "data" / "other.yaml")]
+    assert affected_jobs(changed, jobs, str(workspace / "templates")) == [jobs[1]]
+
+
+@pytest.mark.unit
+def test_template_change_affects_jobs_of_that_kind(workspace, jobs):
+    templates = workspace / "templates"
+    assert affected_jobs([str(templates / "cv.tex")], jobs, str(templates)) == jobs[:2]
+    assert affected_jobs([str(templates / "partial.tex")], jobs, str(templates)) == jobs
+
+
+@pytest.mark.unit
+def test_unrelated_change_affects_nothing(workspace, jobs):
+    assert affected_jobs([str(workspace / "notes.md")], jobs, str(workspace / "templates")) == []
+
+
+@pytest.mark.unit
+def test_watch_rebuilds_on_change(workspace, jobs):
+    rebuilds = []
+    rebuilt = threading.Event()
+    stop = threading.Event()
+
+    def on_rebuild(results):
+        rebuilds.append(results)
+        if len(rebuilds) > 1:
+            rebuilt.set()
+
+    thread = threading.Thread(
+        target=watch,
+        args=(jobs,),
+        kwargs=dict(
+            template_dir=str(workspace / "templates"),
+            on_rebuild=on_rebuild,
+            stop_event=stop,
+            cache_dir=None,
+            input_cache_dir=None,
+        ),
+    )
+    thread.start()
+    try:
+        for _ in range(50):
+            if rebuilds:
+                break
+            time.sleep(0.05)
+        assert [r.written for r in rebuilds[0]] == [True, True, True]
+        time.sleep(0.5)  # let the watcher register before editing
+
+        cv_yaml = workspace / "data" / "cv.yaml"
+        cv_yaml.write_text(cv_yaml.read_text().replace("Oakland", "Berkeley"))
+        assert rebuilt.wait(10)
+    finally:
+        stop.set()
+        thread.join(10)
+
+    assert [r.job for r in rebuilds[1]] == [jobs[0]]
+    assert "Berkeley" in (workspace / "cv.tex").read_text()
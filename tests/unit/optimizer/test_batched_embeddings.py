@@ -0,0 +1,134 @@
+import base64
+import json
+import threading
+import time
+from array import array
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from langchain_openai import OpenAIEmbeddings
+from optimizer.utils.batched_embeddings import BatchedEmbeddings
+
+
+class FakeEmbeddingServer:
+    """OpenAI-compatible /v1/embeddings endpoint that can answer 429 first"""
+
+    def __init__(self, rate_limit_first=0, latency=0.02):
+        self.rate_limit_first = rate_limit_first
+        self.latency = latency
+        self.batches = []
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with server.lock:
+                    server.requests += 1
+                    limited = server.requests <= server.rate_limit_first
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                time.sleep(server.latency)
+                with server.lock:
+                    server.in_flight -= 1
+
+                if limited:
+                    self.send_response(429)
+                    self.send_header("Retry-After", "0.05")
+                    payload = {"error": {"message": "rate limited", "type": "requests"}}
+                else:
+                    server.batches.append(body["input"])
+                    self.send_response(200)
+                    payload = {
+                        "object": "list",
+                        "model": body["model"],
+                        "data": [
+                            {"object": "embedding", "index": i, "embedding": encode(text, body)}
+                            for i, text in enumerate(body["input"])
+                        ],
+                        "usage": {"prompt_tokens": 1, "total_tokens": 1},
+                    }
+                data = json.dumps(payload).encode()
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def encode(text, body):
+    vector = [float(len(text)), 1.0]
+    if body.get("encoding_format") == "base64":
+        return base64.b64encode(array("f", vector).tobytes()).decode()
+    return vector
+
+
+@pytest.fixture
+def server():
+    server = FakeEmbeddingServer()
+    yield server
+    server.close()
+
+
+def client(server):
+    return OpenAIEmbeddings(
+        model="fake-embedding",
+        base_url=server.url,
+        api_key="test",
+        check_embedding_ctx_length=False,
+        max_retries=0,
+    )
+
+
+@pytest.mark.unit
+def test_documents_are_embedded_in_bounded_concurrent_batches(server):
+    progress = []
+    embeddings = BatchedEmbeddings(
+        client(server),
+        batch_size=3,
+        concurrency=2,
+        on_progress=lambda done, total, seconds: progress.append((done, total)),
+        progress_interval=0,
+    )
+    texts = [f"chunk {'x' * i}" for i in range(10)]
+
+    vectors = embeddings.embed_documents(texts)
+
+    assert vectors == [[float(len(text)), 1.0] for text in texts]
+    assert sorted(len(batch) for batch in server.batches) == [1, 3, 3, 3]
+    assert server.max_in_flight <= 2
+    assert progress[-1] == (10, 10)
+
+
+@pytest.mark.unit
+def test_rate_limited_batches_back_off_and_retry(server):
+    server.rate_limit_first = 3
+    embeddings = BatchedEmbeddings(client(server), batch_size=2, concurrency=2, max_retries=5)
+
+    vectors = embeddings.embed_documents(["a", "bb", "ccc", "dddd"])
+
+    assert vectors == [[1.0, 1.0], [2.0, 1.0], [3.0, 1.0], [4.0, 1.0]]
+    assert embeddings.rate_limited == 3
+
+
+@pytest.mark.unit
+def test_gives_up_after_max_retries(server):
+    server.rate_limit_first = 100
+    embeddings = BatchedEmbeddings(client(server), batch_size=2, concurrency=1, max_retries=1)
+
+    with pytest.raises(Exception) as exc_info:
+        embeddings.embed_documents(["a", "b"])
+    assert getattr(exc_info.value, "status_code", None) == 429
+    assert server.requests == 2
@@ -0,0 +1,56 @@
+import pytest
+from langchain_core.documents import Document
+from optimizer.utils.bm25 import BM25Index, reciprocal_rank_fusion, tokenize
+
+
+def chunks(*texts):
+    return [f"id{i}" for i in range(len(texts))], [Document(page_content=t) for t in texts]
+
+
+@pytest.mark.unit
+def test_tokenize_keeps_language_names():
+    assert tokenize("C++, C# and PHP 8.") == ["c++", "c#", "and", "php", "8"]
+
+
+@pytest.mark.unit
+def test_exact_terms_rank_first_and_removed_chunks_disappear():
+    index = BM25Index()
+    index.add(*chunks(
+        "Built web APIs and services",
+        "Migrated the API layer to GraphQL",
+        "GraphQL GraphQL schema design and GraphQL federation",
+    ))
+
+    assert [chunk_id for chunk_id, _ in index.search("graphql", 5)] == ["id2", "id1"]
+
+    index.remove(["id2"])
+    assert [chunk_id for chunk_id, _ in index.search("graphql", 5)] == ["id1"]
+
+
+@pytest.mark.unit
+def test_search_filters_on_metadata():
+    index = BM25Index()
+    index.add(["p", "c"], [
+        Document(page_content="GraphQL gateway", metadata={"category": "projects"}),
+        Document(page_content="GraphQL consultancy", metadata={"category": "companies"}),
+    ])
+
+    assert [chunk_id for chunk_id, _ in index.search("graphql", 5, {"category": "companies"})] == ["c"]
+
+
+@pytest.mark.unit
+def test_index_round_trips_through_disk(tmp_path):
+    index = BM25Index()
+    ids, docs = chunks("Symfony on PHP 8")
+    docs[0].metadata["source"] = "kb/php.md"
+    index.add(ids, docs)
+    index.save(str(tmp_path / "bm25.json"))
+
+    loaded = BM25Index.load(str(tmp_path / "bm25.json"))
+    assert loaded.search("symfony", 1) == index.search("symfony", 1)
+    assert loaded.document("id0").metadata == {"source": "kb/php.md"}
+
+
+@pytest.mark.unit
+def test_reciprocal_rank_fusion_rewards_agreement():
+    assert reciprocal_rank_fusion([["a", "b", "c"], ["c", "d"]]) == ["c", "a", "b", "d"]
@@ -0,0 +1,76 @@
+import pytest
+from langchain_core.documents import Document
+from optimizer.utils.markdown_splitter import split_file
+from optimizer.utils.context_packing import GAP_MARKER, merge_chunks, pack_documents
+
+TEXT = "Led the PHP team. Upgraded Symfony to 6. Wrote the GraphQL gateway. Ran the on-call rota."
+
+
+def chunk(start, end, source="kb/php.md", offsets=True):
+    metadata = {"source": source}
+    if offsets:
+        metadata["start_index"] = start
+    return Document(page_content=TEXT[start:end], metadata=metadata)
+
+
+@pytest.mark.unit
+def test_overlapping_and_adjacent_chunks_of_one_source_are_merged():
+    passages = merge_chunks([
+        chunk(18, 60),
+        chunk(0, 30),
+        chunk(60, len(TEXT)),
+        chunk(0, 17, source="kb/other.md"),
+    ])
+
+    assert [p.page_content for p in passages] == [TEXT, TEXT[:17]]
+    assert passages[0].metadata == {"source": "kb/php.md", "start_index": 0}
+
+
+@pytest.mark.unit
+def test_merging_does_not_depend_on_retrieval_order():
+    # The chunk bridging the other two ranks last
+    for offsets in (True, False):
+        passages = merge_chunks([
+            chunk(40, len(TEXT), offsets=offsets),
+            chunk(0, 30, offsets=offsets),
+            chunk(5, 65, offsets=offsets),
+        ])
+
+        assert [p.page_content for p in passages] == [TEXT]
+    assert passages[0].metadata == {"source": "kb/php.md"}
+
+
+@pytest.mark.unit
+def test_chunks_without_offsets_merge_on_shared_text():
+    passages = merge_chunks([chunk(0, 60, offsets=False), chunk(30, len(TEXT), offsets=False)])
+    assert [p.page_content for p in passages] == [TEXT]
+
+    apart = merge_chunks([chunk(0, 17, offsets=False), chunk(40, 70, offsets=False)])
+    assert len(apart) == 2
+
+
+@pytest.mark.unit
+def test_over_budget_results_keep_the_query_relevant_sentences():
+    packed = pack_documents([chunk(0, len(TEXT)), chunk(0, 40)], "GraphQL gateway", token_budget=8)
+
+    assert packed.passages[0].page_content == f"{GAP_MARKER}\nWrote the GraphQL gateway."
+    assert packed.tokens_before == 33
+    assert packed.tokens_saved == 33 - packed.tokens_after > 0
+
+
+@pytest.mark.unit
+def test_within_budget_results_are_only_merged():
+    packed = pack_documents([chunk(0, 40), chunk(30, len(TEXT))], "Symfony", token_budget=1000)
+    assert [p.page_content for p in packed.passages] == [TEXT]
+
+
+@pytest.mark.unit
+def test_split_chunks_record_their_offsets(tmp_path):
+    path = tmp_path / "note.md"
+    path.write_text("word " * 100)
+
+    chunks = split_file(str(path), chunk_size=120, chunk_overlap=20)
+
+    assert all(
+        path.read_text()[c.metadata["start_index"]:].startswith(c.page_content) for c in chunks
+    )
@@ -0,0 +1,241 @@
+import json
+import os
+from pathlib import Path
+import pytest
+from langchain_core.embeddings import Embeddings
+from optimizer.embedder import INDEX_MANIFEST_NAME, KnowledgeBaseEmbedder, split_files
+from optimizer.utils.bm25 import BM25Index, bm25_index_path
+from optimizer.utils.embedding_backends import EMBEDDING_BACKENDS
+from optimizer.utils.vector_utils import (
+    build_lock,
+    invalidate_vector_db,
+    read_version_stamp,
+    staging_path,
+)
+
+
+class FakeEmbeddings(Embeddings):
+    embedded = []
+
+    def __init__(self, model=None, **kwargs):
+        pass
+
+    def embed_documents(self, texts):
+        FakeEmbeddings.embedded.extend(texts)
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        return [float(len(text)), 1.0]
+
+
+@pytest.fixture
+def kb(tmp_path, monkeypatch):
+    monkeypatch.setitem(EMBEDDING_BACKENDS, "openai", FakeEmbeddings)
+    FakeEmbeddings.embedded = []
+    root = tmp_path / "knowledge-base"
+    (root / "projects").mkdir(parents=True)
+    (root / "projects" / "alpha.md").write_text("Alpha project in Python")
+    (root / "projects" / "beta.md").write_text("Beta project on AWS")
+    (root / "skills.md").write_text("Skills: Python, SQL")
+    yield root, tmp_path / "vector_db"
+    invalidate_vector_db()
+
+
+def collection_documents(embedder):
+    return sorted(embedder.get_vector_db().get()["documents"])
+
+
+@pytest.mark.unit
+def test_incremental_build_only_reembeds_changed_files(kb):
+    root, db = kb
+    KnowledgeBaseEmbedder(str(root), str(db)).build_if_needed()
+    first_version = read_version_stamp(str(db))
+    assert len(FakeEmbeddings.embedded) == 3
+
+    FakeEmbeddings.embedded = []
+    (root / "projects" / "alpha.md").write_text("Alpha project in Rust")
+    (root / "projects" / "beta.md").unlink()
+    (root / "education.md").write_text("BSc Computer Science")
+    embedder = KnowledgeBaseEmbedder(str(root), str(db))
+    embedder.build_if_needed()
+
+    assert sorted(FakeEmbeddings.embedded) == ["Alpha project in Rust", "BSc Computer Science"]
+    assert collection_documents(embedder) == [
+        "Alpha project in Rust",
+        "BSc Computer Science",
+        "Skills: Python, SQL",
+    ]
+    manifest = json.loads((db / INDEX_MANIFEST_NAME).read_text())
+    assert sorted(manifest["files"]) == ["education.md", "projects/alpha.md", "skills.md"]
+    assert read_version_stamp(str(db)) != first_version
+    bm25 = BM25Index.load(bm25_index_path(str(db)))
+    assert sorted(bm25.docs) == sorted(id for entry in manifest["files"].values() for id in entry["ids"])
+    assert [bm25.document(i).page_content for i, _ in bm25.search("rust", 5)] == ["Alpha project in Rust"]
+
+
+@pytest.mark.unit
+def test_unchanged_knowledge_base_is_left_alone(kb):
+    root, db = kb
+    KnowledgeBaseEmbedder(str(root), str(db)).build_if_needed()
+    version = read_version_stamp(str(db))
+
+    FakeEmbeddings.embedded = []
+    KnowledgeBaseEmbedder(str(root), str(db)).build_if_needed()
+
+    assert FakeEmbeddings.embedded == []
+    assert read_version_stamp(str(db)) == version
+
+
+@pytest.mark.unit
+def test_changed_chunk_settings_force_a_full_rebuild(kb):
+    root, db = kb
+    KnowledgeBaseEmbedder(str(root), str(db)).build_if_needed()
+
+    FakeEmbeddings.embedded = []
+    embedder = KnowledgeBaseEmbedder(str(root), str(db))
+    embedder.chunk_size += 100
+    embedder.build_if_needed()
+
+    assert len(FakeEmbeddings.embedded) == 3
+    assert len(collection_documents(embedder)) == 3
+
+
+@pytest.mark.unit
+def test_rebuilds_reuse_stored_chunk_embeddings(kb, tmp_path):
+    root, db = kb
+    store = str(tmp_path / "chunk-embeddings.sqlite3")
+    KnowledgeBaseEmbedder(str(root), str(db), embedding_store_abspath=store).build_if_needed()
+
+    FakeEmbeddings.embedded = []
+    (root / "skills.md").write_text("Skills: Python, SQL, Go")
+    embedder = KnowledgeBaseEmbedder(
+        str(root), str(db), force_rebuild=True, embedding_store_abspath=store
+    )
+    embedder.chunk_size += 100
+    embedder.build_if_needed()
+
+    assert FakeEmbeddings.embedded == ["Skills: Python, SQL, Go"]
+    assert len(collection_documents(embedder)) == 3
+
+
+@pytest.mark.unit
+def test_bm25_index_is_saved_once_per_build(kb, monkeypatch):
+    root, db = kb
+    saves = []
+    original = BM25Index.save
+    monkeypatch.setattr(BM25Index, "save", lambda self, path: saves.append(original(self, path)))
+    embedder = KnowledgeBaseEmbedder(str(root), str(db))
+    embedder.embedding_batch_size = embedder.embedding_concurrency = 1
+
+    embedder.build_if_needed()
+
+    assert len(saves) == 1
+    assert len(BM25Index.load(bm25_index_path(str(db))).docs) == 3
+
+
+@pytest.mark.unit
+def test_interrupted_build_resumes_with_the_remaining_files(kb, monkeypatch):
+    root, db = kb
+    embedder = KnowledgeBaseEmbedder(str(root), str(db))
+    embedder.embedding_batch_size = embedder.embedding_concurrency = 1
+
+    def fail_on_skills(self, texts):
+        if any(text.startswith("Skills") for text in texts):
+            raise KeyboardInterrupt
+        return original(self, texts)
+
+    original = FakeEmbeddings.embed_documents
+    monkeypatch.setattr(FakeEmbeddings, "embed_documents", fail_on_skills)
+    with pytest.raises(KeyboardInterrupt):
+        embedder.build_if_needed()
+    monkeypatch.setattr(FakeEmbeddings, "embed_documents", original)
+
+    assert not db.exists()
+    manifest = json.loads((Path(staging_path(str(db))) / INDEX_MANIFEST_NAME).read_text())
+    assert sorted(manifest["files"]) == ["projects/alpha.md", "projects/beta.md"]
+
+    FakeEmbeddings.embedded = []
+    KnowledgeBaseEmbedder(str(root), str(db)).build_if_needed()
+
+    assert FakeEmbeddings.embedded == ["Skills: Python, SQL"]
+    assert len(collection_documents(embedder)) == 3
+
+
+@pytest.mark.unit
+def test_builds_are_published_as_snapshots_behind_a_symlink(kb):
+    root, db = kb
+    KnowledgeBaseEmbedder(str(root), str(db)).build_if_needed()
+    first = os.path.realpath(db)
+    old_handle = KnowledgeBaseEmbedder(str(root), str(db)).get_vector_db()
+
+    for text in ["Skills: Python, SQL, Go", "Skills: Python, SQL, Go, Rust"]:
+        (root / "skills.md").write_text(text)
+        embedder = KnowledgeBaseEmbedder(str(root), str(db))
+        embedder.build_if_needed()
+        if text.endswith("Go"):
+            # The reader's snapshot survives one swap untouched
+            assert "Skills: Python, SQL" in old_handle.get()["documents"]
+
+    assert db.is_symlink()
+    assert not os.path.exists(first)
+    assert not os.path.exists(staging_path(str(db)))
+    assert len(list(db.parent.glob(f".{db.name}-*"))) == 2
+    assert "Skills: Python, SQL, Go, Rust" in collection_documents(embedder)
+
+
+@pytest.mark.unit
+def test_pruning_keeps_the_previous_snapshot_whatever_its_mtime(kb):
+    root, db = kb
+    published = []
+    for text in ["Go", "Rust", "Zig"]:
+        (root / "skills.md").write_text(f"Skills: {text}")
+        KnowledgeBaseEmbedder(str(root), str(db)).build_if_needed()
+        published.append(os.path.realpath(db))
+        if len(published) == 2:
+            # A reader creating files in the oldest snapshot makes it look newest
+            os.utime(published[0], (2**33, 2**33))
+
+    assert sorted(db.parent.glob(f".{db.name}-*")) == [Path(p) for p in published[1:]]
+
+
+@pytest.mark.unit
+def test_build_defers_to_a_running_build_when_a_db_exists(kb):
+    root, db = kb
+    KnowledgeBaseEmbedder(str(root), str(db)).build_if_needed()
+    version = read_version_stamp(str(db))
+
+    FakeEmbeddings.embedded = []
+    (root / "skills.md").write_text("Skills: Python, SQL, Go")
+    with build_lock(str(db)):
+        KnowledgeBaseEmbedder(str(root), str(db)).build_if_needed()
+
+    assert FakeEmbeddings.embedded == []
+    assert read_version_stamp(str(db)) == version
+
+
+@pytest.mark.unit
+def test_split_files_runs_in_process_by_default(tmp_path, monkeypatch):
+    monkeypatch.setattr("optimizer.embedder.ProcessPoolExecutor", None)
+    files = {}
+    for i in range(3):
+        path = tmp_path / f"note{i}.md"
+        path.write_text(f"note {i}")
+        files[path.name] = (str(path), "hash")
+
+    split = list(split_files(files, chunk_size=100, chunk_overlap=0))
+
+    assert [chunks[0].page_content for _, chunks in split] == ["note 0", "note 1", "note 2"]
+
+
+@pytest.mark.unit
+def test_split_files_keeps_order_across_worker_processes(tmp_path):
+    files = {}
+    for i in range(6):
+        path = tmp_path / f"note{i}.md"
+        path.write_text(f"note {i}")
+        files[path.name] = (str(path), "hash")
+
+    split = list(split_files(files, chunk_size=100, chunk_overlap=0, workers=2))
+
+    assert [relpath for relpath, _ in split] == list(files)
+    assert [chunks[0].page_content for _, chunks in split] == [f"note {i}" for i in range(6)]
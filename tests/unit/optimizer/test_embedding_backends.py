@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from optimizer.embedder import KnowledgeBaseEmbedder
+from optimizer.tools import knowledge_base_tool
+from optimizer.tools.knowledge_base_tool import KnowledgeBaseTool
+from optimizer.utils.embedding_backends import HashingEmbeddings, create_embeddings
+from optimizer.utils.vector_utils import invalidate_vector_db
+
+
+@pytest.mark.unit
+def test_hashing_embeddings_are_normalized_and_deterministic():
+    embeddings = HashingEmbeddings(dimensions=256)
+    vectors = np.array(embeddings.embed_documents(["Symfony and PHP 8", "", "GraphQL APIs"]))
+
+    assert vectors.shape == (3, 256)
+    assert np.allclose(np.linalg.norm(vectors[[0, 2]], axis=1), 1.0, atol=1e-6)
+    assert not vectors[1].any()
+    assert embeddings.embed_query("GraphQL APIs") == pytest.approx(vectors[2].tolist())
+
+
+@pytest.mark.unit
+def test_hashing_embeddings_rank_shared_terms_higher():
+    embeddings = HashingEmbeddings()
+    query = np.array(embeddings.embed_query("PHP Symfony experience"))
+    related, unrelated = np.array(
+        embeddings.embed_documents(
+            ["Built REST APIs in PHP with Symfony", "Trained neural networks on GPUs"]
+        )
+    )
+
+    assert query @ related > query @ unrelated
+
+
+@pytest.mark.unit
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match="Unknown embedding backend"):
+        create_embeddings("word2vec", "model")
+
+
+@pytest.mark.unit
+def test_local_backend_builds_and_queries_offline(tmp_path, monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    root = tmp_path / "knowledge-base"
+    root.mkdir()
+    (root / "php.md").write_text("Maintained a Symfony application on PHP 8")
+    (root / "ml.md").write_text("Trained neural networks with PyTorch")
+    db = str(tmp_path / "vector_db")
+
+    embedder = KnowledgeBaseEmbedder(str(root), db)
+    embedder.embedding_backend = "local"
+    embedder.build_if_needed()
+
+    tool = KnowledgeBaseTool(vector_db_path=db)
+    tool.embedding_backend = "local"
+    tool.num_results = 1
+    knowledge_base_tool._result_cache.clear()
+    try:
+        assert tool._run("Symfony").startswith("Maintained a Symfony application")
+    finally:
+        knowledge_base_tool._result_cache.clear()
+        invalidate_vector_db()
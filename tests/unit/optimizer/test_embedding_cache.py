@@ -0,0 +1,102 @@
+import pytest
+from optimizer.utils.embedding_cache import (
+    CachedEmbeddings,
+    EmbeddingCache,
+    normalize_query,
+)
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.calls = []
+
+    def embed_query(self, text):
+        self.calls.append(text)
+        return [float(len(text)), 0.5, -1.0]
+
+
+@pytest.mark.unit
+def test_normalize_query_ignores_case_and_whitespace():
+    assert normalize_query("  Python\tEXPERIENCE \n") == "python experience"
+
+
+@pytest.mark.unit
+def test_repeated_and_near_identical_queries_hit_memory():
+    inner = CountingEmbeddings()
+    embeddings = CachedEmbeddings(inner, "model", EmbeddingCache())
+
+    first = embeddings.embed_query("AWS projects")
+    second = embeddings.embed_query("aws   Projects")
+
+    assert first == second
+    assert inner.calls == ["AWS projects"]
+    assert (embeddings.cache.hits, embeddings.cache.misses) == (1, 1)
+
+
+@pytest.mark.unit
+def test_disk_tier_survives_a_new_process_cache(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    EmbeddingCache(path).put("model", "python experience", [0.25, 0.5])
+
+    cache = EmbeddingCache(path)
+    assert cache.get("model", "python experience") == [0.25, 0.5]
+    assert cache.get("other-model", "python experience") is None
+    assert (cache.hits, cache.disk_hits, cache.misses) == (1, 1, 1)
+
+
+@pytest.mark.unit
+def test_memory_tier_evicts_least_recently_used():
+    cache = EmbeddingCache(memory_size=2)
+    cache.put("m", "a", [1.0])
+    cache.put("m", "b", [2.0])
+    cache.get("m", "a")
+    cache.put("m", "c", [3.0])
+
+    assert cache.stats()["memory_entries"] == 2
+    assert cache.get("m", "b") is None
+    assert cache.get("m", "a") == [1.0]
+
+
+@pytest.mark.unit
+def test_disk_tier_is_bounded(tmp_path):
+    path = str(tmp_path / "e.sqlite3")
+    cache = EmbeddingCache(path, memory_size=0, max_disk_entries=2, eviction_interval=3)
+    for i, text in enumerate("abcd"):
+        cache.put("m", text, [float(i)])
+        cache.get("m", "a")
+
+    fresh = EmbeddingCache(path)
+    # Checked after the third write only, so the fourth is still pending
+    assert fresh.stats()["disk_entries"] == 3
+    assert fresh.get("m", "b") is None
+    assert fresh.get("m", "a") == [0.0]
+    assert fresh.get("m", "c") == [2.0]
+
+
+class CountingDocumentEmbeddings(CountingEmbeddings):
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+
+@pytest.mark.unit
+def test_documents_are_embedded_once_per_distinct_text(tmp_path):
+    inner = CountingDocumentEmbeddings()
+    store = EmbeddingCache(str(tmp_path / "chunks.sqlite3"), memory_size=0)
+    embeddings = CachedEmbeddings(inner, "model", document_cache=store)
+
+    assert embeddings.embed_documents(["ab", "abc", "ab"]) == [[2.0], [3.0], [2.0]]
+    assert embeddings.embed_documents(["abc", "abcd"]) == [[3.0], [4.0]]
+    assert inner.calls == [["ab", "abc"], ["abcd"]]
+
+
+@pytest.mark.unit
+def test_query_batches_send_the_original_text_once_per_cache_key():
+    inner = CountingDocumentEmbeddings()
+    embeddings = CachedEmbeddings(inner, "model", EmbeddingCache())
+
+    vectors = embeddings.embed_queries(["Go  Services", "go services", "SQL"])
+    assert embeddings.embed_queries(["sql"]) == [vectors[2]]
+
+    assert vectors[0] == vectors[1]
+    assert inner.calls == [["Go  Services", "SQL"]]
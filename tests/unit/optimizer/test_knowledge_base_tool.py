@@ -0,0 +1,181 @@
+import pytest
+from langchain_core.documents import Document
+from optimizer.tools import knowledge_base_tool
+from optimizer.embedder import KnowledgeBaseEmbedder
+from optimizer.tools.knowledge_base_tool import KnowledgeBaseInput, KnowledgeBaseTool
+from optimizer.utils.embedding_backends import HashingEmbeddings
+from optimizer.utils.bm25 import BM25Index, bm25_index_path
+from optimizer.utils.vector_utils import invalidate_vector_db, write_version_stamp
+
+
+class FakeVectorStore:
+    def __init__(self):
+        self.queries = []
+        self.filters = []
+
+    def similarity_search_with_score(self, query, k, filter=None):
+        self.queries.append((query, k))
+        self.filters.append(filter)
+        return [(Document(page_content=f"about {query}", metadata={"source": "kb/a.md"}, id="a-0"), 0.1)]
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = FakeVectorStore()
+    monkeypatch.setattr(knowledge_base_tool, "get_shared_vector_db", lambda **kwargs: store)
+    knowledge_base_tool._result_cache.clear()
+    yield store
+    knowledge_base_tool._result_cache.clear()
+
+
+@pytest.mark.unit
+def test_repeat_queries_are_served_from_the_result_cache(tmp_path, store):
+    tool = KnowledgeBaseTool(vector_db_path=str(tmp_path))
+
+    first = tool._run("Python experience")
+    again = KnowledgeBaseTool(vector_db_path=str(tmp_path))._run("python  experience")
+
+    assert again == first
+    assert first == "about Python experience\n\nSources:\n- kb/a.md"
+    assert len(store.queries) == 1
+
+
+@pytest.mark.unit
+def test_rebuilt_knowledge_base_invalidates_results(tmp_path, store):
+    tool = KnowledgeBaseTool(vector_db_path=str(tmp_path))
+    write_version_stamp(str(tmp_path))
+    tool._run("AWS projects")
+
+    write_version_stamp(str(tmp_path))
+    tool._run("AWS projects")
+
+    assert len(store.queries) == 2
+
+
+@pytest.mark.unit
+def test_hybrid_search_surfaces_exact_term_hits(tmp_path, store):
+    bm25 = BM25Index()
+    bm25.add(
+        ["php", "graphql"],
+        [
+            Document(page_content="Symfony on PHP 8", metadata={"source": "kb/php.md"}),
+            Document(page_content="Designed a GraphQL gateway", metadata={"source": "kb/api.md"}),
+        ],
+    )
+    bm25.save(bm25_index_path(str(tmp_path)))
+    write_version_stamp(str(tmp_path))
+    tool = KnowledgeBaseTool(vector_db_path=str(tmp_path))
+    tool.num_results = 2
+
+    result = tool._run("GraphQL")
+
+    assert result.startswith("about GraphQL\n\nDesigned a GraphQL gateway")
+    assert "- kb/api.md" in result
+
+
+@pytest.mark.unit
+def test_batch_queries_share_one_embedding_request(tmp_path, monkeypatch):
+    root = tmp_path / "knowledge-base"
+    root.mkdir()
+    (root / "php.md").write_text("Maintained a Symfony application on PHP 8")
+    (root / "api.md").write_text("Designed a GraphQL gateway for mobile clients")
+    (root / "ml.md").write_text("Trained neural networks with PyTorch")
+    db = str(tmp_path / "vector_db")
+    embedder = KnowledgeBaseEmbedder(str(root), db)
+    embedder.embedding_backend = "local"
+    embedder.build_if_needed()
+
+    batches = []
+    embed_documents = HashingEmbeddings.embed_documents
+    monkeypatch.setattr(
+        HashingEmbeddings,
+        "embed_documents",
+        lambda self, texts: batches.append(list(texts)) or embed_documents(self, texts),
+    )
+    knowledge_base_tool._result_cache.clear()
+    tool = KnowledgeBaseTool(
+        vector_db_path=db, embedding_cache_path=str(tmp_path / "queries.sqlite3")
+    )
+    tool.embedding_backend = "local"
+    tool.num_results = 1
+    try:
+        results = tool.search_many(["Symfony", "GraphQL", "PyTorch"])
+        grouped = tool._run(queries=["GraphQL", "Symfony"])
+    finally:
+        knowledge_base_tool._result_cache.clear()
+        invalidate_vector_db()
+
+    assert batches == [["Symfony", "GraphQL", "PyTorch"]]
+    assert list(results) == ["Symfony", "GraphQL", "PyTorch"]
+    assert results["GraphQL"] == (
+        f"Designed a GraphQL gateway for mobile clients\n\nSources:\n- {root / 'api.md'}"
+    )
+    assert results["PyTorch"].startswith("Trained neural networks")
+    assert grouped.startswith("## Results for: GraphQL\n\nDesigned a GraphQL gateway")
+    assert "## Results for: Symfony\n\nMaintained a Symfony application" in grouped
+
+
+@pytest.mark.unit
+def test_input_needs_a_query():
+    with pytest.raises(ValueError):
+        KnowledgeBaseInput()
+    assert KnowledgeBaseInput(queries=["AWS"]).queries == ["AWS"]
+
+
+@pytest.mark.unit
+def test_filters_are_pushed_down_and_cached_separately(tmp_path, store):
+    (tmp_path / ".kb-manifest.json").write_text(
+        '{"files": {"projects/torch-saas.md": {}, "projects/anvil.md": {}, "companies/acme.md": {},'
+        ' "hidden/x.md": {}}}'
+    )
+    tool = KnowledgeBaseTool(vector_db_path=str(tmp_path))
+
+    tool._run("PHP", category="projects")
+    tool._run("PHP", source_prefix="projects/torch", entity="torch-saas")
+    tool._run("PHP")
+    missing = tool._run("PHP", source_prefix="developers/")
+    hidden = tool._run("PHP", source_prefix="./.hidden/")
+
+    assert store.filters == [
+        {"category": "projects"},
+        {"$and": [{"entity": "torch-saas"}, {"path": {"$in": ["projects/torch-saas.md"]}}]},
+        None,
+    ]
+    assert missing.startswith("No relevant content found")
+    assert hidden.startswith("No relevant content found")
+
+
+@pytest.mark.unit
+def test_source_prefix_without_a_manifest_is_reported(tmp_path, store):
+    result = KnowledgeBaseTool(vector_db_path=str(tmp_path))._run("PHP", source_prefix="projects/")
+
+    assert result.startswith("Cannot filter by source_prefix")
+    assert store.queries == []
+
+
+@pytest.mark.unit
+def test_category_and_prefix_filters_on_a_chroma_collection(tmp_path):
+    root = tmp_path / "knowledge-base"
+    (root / "projects").mkdir(parents=True)
+    (root / "companies").mkdir()
+    (root / "projects" / "gateway.md").write_text("# Gateway\n\nBuilt a GraphQL gateway in PHP")
+    (root / "companies" / "acme.md").write_text("# Acme\n\nAcme sells GraphQL tooling")
+    db = str(tmp_path / "vector_db")
+    embedder = KnowledgeBaseEmbedder(str(root), db)
+    embedder.embedding_backend = "local"
+    embedder.build_if_needed()
+
+    knowledge_base_tool._result_cache.clear()
+    tool = KnowledgeBaseTool(vector_db_path=db)
+    tool.embedding_backend = "local"
+    try:
+        companies = tool._run("GraphQL", category="companies")
+        batch = tool.search_many(["GraphQL", "PHP"], source_prefix="projects/")
+    finally:
+        knowledge_base_tool._result_cache.clear()
+        invalidate_vector_db()
+
+    assert companies == (
+        f"# Acme\n\nAcme sells GraphQL tooling\n\nSources:\n- {root / 'companies' / 'acme.md'}"
+    )
+    assert all("Acme" not in result and "gateway" in result for result in batch.values())
@@ -0,0 +1,32 @@
+import subprocess
+import sys
+import pytest
+
+HEAVY_PACKAGES = ("crewai", "crewai_tools", "langchain_core", "chromadb", "openai", "jsonschema")
+
+
+def imported_modules(statement):
+    completed = subprocess.run(
+        [sys.executable, "-c", f"{statement}; import sys; print('\\n'.join(sys.modules))"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(completed.stdout.split())
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("module", ["optimizer.cli", "optimizer.config.settings"])
+def test_optimizer_entry_points_defer_heavy_imports(module):
+    eager = [name for name in imported_modules(f"import {module}") if name.split(".")[0] in HEAVY_PACKAGES]
+    assert eager == []
+
+
+@pytest.mark.unit
+def test_builder_cli_defers_template_engine():
+    assert "jinja2" not in imported_modules("import builder.cli")
+
+
+@pytest.mark.unit
+def test_package_exports_still_resolve():
+    assert "optimizer.models" in imported_modules("from optimizer import JobPosting")
@@ -0,0 +1,85 @@
+import pytest
+from optimizer.utils.markdown_splitter import path_metadata, sections, split_file, split_markdown
+
+PROJECT = """# Torch SaaS
+
+Multi-tenant billing platform.
+
+## Stack
+
+PHP 8, Symfony, PostgreSQL.
+
+```bash
+# not a heading
+make deploy
+```
+
+## Team
+
+### Lead
+
+Led four developers.
+"""
+
+
+@pytest.mark.unit
+def test_path_metadata_uses_top_folder_and_file_name():
+    assert path_metadata("projects/torch-saas.md") == {
+        "path": "projects/torch-saas.md",
+        "category": "projects",
+        "entity": "torch-saas",
+    }
+    assert path_metadata("skills-mapping.md")["category"] == "general"
+
+
+@pytest.mark.unit
+def test_sections_follow_the_heading_hierarchy():
+    paths = [path for _, _, path in sections(PROJECT)]
+    assert paths == [
+        ("Torch SaaS",),
+        ("Torch SaaS", "Stack"),
+        ("Torch SaaS", "Team"),
+        ("Torch SaaS", "Team", "Lead"),
+    ]
+
+
+@pytest.mark.unit
+def test_small_sections_merge_under_their_common_heading():
+    chunks = split_markdown(PROJECT, {"entity": "torch-saas"}, chunk_size=85, chunk_overlap=0)
+
+    assert [c.metadata["heading_path"] for c in chunks] == [
+        "Torch SaaS",
+        "Torch SaaS > Stack",
+        "Torch SaaS > Team",
+    ]
+    assert chunks[2].page_content == "## Team\n\n### Lead\n\nLed four developers."
+    for chunk in chunks:
+        assert chunk.metadata["entity"] == "torch-saas"
+        assert PROJECT[chunk.metadata["start_index"]:].startswith(chunk.page_content)
+
+
+@pytest.mark.unit
+def test_long_sections_are_split_with_their_heading_path():
+    text = "# Anvil\n\n## History\n\n" + "Forged in the great underground empire. " * 20
+    chunks = split_markdown(text, {}, chunk_size=200, chunk_overlap=40)
+
+    assert len(chunks) > 2
+    assert {c.metadata["heading_path"] for c in chunks[1:]} == {"Anvil > History"}
+    assert all(text[c.metadata["start_index"]:].startswith(c.page_content) for c in chunks)
+
+
+@pytest.mark.unit
+def test_split_file_attaches_path_metadata(tmp_path):
+    path = tmp_path / "acme.md"
+    path.write_text("# Acme\n\nWidgets since 1949.\n")
+
+    [chunk] = split_file(str(path), 500, 50, relpath="companies/acme.md")
+
+    assert chunk.metadata == {
+        "source": str(path),
+        "path": "companies/acme.md",
+        "category": "companies",
+        "entity": "acme",
+        "heading_path": "Acme",
+        "start_index": 0,
+    }
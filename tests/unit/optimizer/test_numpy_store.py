@@ -0,0 +1,113 @@
+import os
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+from optimizer.embedder import KnowledgeBaseEmbedder
+from optimizer.tools import knowledge_base_tool
+from optimizer.tools.knowledge_base_tool import KnowledgeBaseTool
+from optimizer.utils.numpy_store import NumpyVectorStore
+from optimizer.utils.vector_utils import invalidate_vector_db
+
+
+class AxisEmbeddings(Embeddings):
+    """Maps "a", "b", "c"... to unit vectors along the first axes"""
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        vector = [0.0] * 4
+        for char in text:
+            vector[ord(char) - ord("a")] += 1.0
+        return vector
+
+
+@pytest.fixture
+def store(tmp_path):
+    return NumpyVectorStore(str(tmp_path), AxisEmbeddings(), "kb")
+
+
+@pytest.mark.unit
+def test_top_k_matches_exact_cosine_ranking(store, tmp_path):
+    store.add_texts(["a", "ab", "b", "cd"], [{"n": i} for i in range(4)], ids=["1", "2", "3", "4"])
+
+    results = store.similarity_search_with_score("aab", k=2)
+
+    assert [doc.id for doc, _ in results] == ["2", "1"]
+    assert results[0][0].metadata == {"n": 1}
+    assert results[0][1] == pytest.approx(1 - 3 / np.sqrt(10))
+    batch = store.similarity_search_by_vectors([[0, 0, 1, 1], [0, 1, 0, 0]], 1)
+    assert [[doc.id for doc, _ in results] for results in batch] == [["4"], ["3"]]
+
+
+@pytest.mark.unit
+def test_filter_restricts_the_rows_searched(store):
+    kinds = ["project", "company", "project", "company"]
+    store.add_texts(
+        ["a", "ab", "b", "cd"], [{"category": kind} for kind in kinds], ids=["1", "2", "3", "4"]
+    )
+
+    results = store.similarity_search("a", k=3, filter={"category": "company"})
+
+    assert [doc.id for doc in results] == ["2", "4"]
+    assert store.similarity_search("a", k=1, filter={"category": {"$in": ["nothing"]}}) == []
+
+
+@pytest.mark.unit
+def test_append_drops_vectors_orphaned_by_an_interrupted_write(store, tmp_path):
+    store.add_texts(["a"], ids=["1"])
+    vector_file = next(tmp_path.glob("*.f32"))
+    with open(vector_file, "ab") as f:
+        f.write(np.ones(4, dtype=np.float32).tobytes())
+
+    store.add_texts(["b"], ids=["2"])
+
+    assert [doc.id for doc in store.similarity_search("b", k=1)] == ["2"]
+    assert vector_file.stat().st_size == 2 * 4 * 4
+
+
+@pytest.mark.unit
+def test_upserts_and_deletes_are_seen_by_other_handles(store, tmp_path):
+    store.add_texts(["a", "b"], ids=["1", "2"])
+    reader = NumpyVectorStore(str(tmp_path), AxisEmbeddings(), "kb")
+    assert [doc.id for doc in reader.similarity_search("a", k=1)] == ["1"]
+
+    store.add_texts(["c"], ids=["1"])
+    store.add_texts(["d"], ids=["3"])
+    assert reader.similarity_search("c", k=1)[0].page_content == "c"
+
+    store.delete(ids=["2"])
+    assert sorted(reader.get()["ids"]) == ["1", "3"]
+    assert len([name for name in os.listdir(tmp_path) if name.endswith(".f32")]) == 1
+
+
+@pytest.mark.unit
+def test_embedder_and_tool_work_on_the_numpy_store(tmp_path):
+    root = tmp_path / "knowledge-base"
+    root.mkdir()
+    (root / "php.md").write_text("Maintained a Symfony application on PHP 8")
+    (root / "ml.md").write_text("Trained neural networks with PyTorch")
+    db = str(tmp_path / "vector_db")
+
+    def build():
+        embedder = KnowledgeBaseEmbedder(str(root), db)
+        embedder.embedding_backend = "local"
+        embedder.vector_store = "numpy"
+        embedder.build_if_needed()
+
+    build()
+    (root / "ml.md").write_text("Deployed Kubernetes clusters on AWS")
+    build()
+
+    tool = KnowledgeBaseTool(vector_db_path=db)
+    tool.embedding_backend = "local"
+    tool.vector_store = "numpy"
+    tool.num_results = 1
+    knowledge_base_tool._result_cache.clear()
+    try:
+        assert tool._run("Kubernetes").startswith("Deployed Kubernetes clusters")
+        assert "Trained neural networks" not in tool._run(queries=["PyTorch", "Symfony"])
+    finally:
+        knowledge_base_tool._result_cache.clear()
+        invalidate_vector_db()
+    assert not os.path.exists(os.path.join(db, "chroma.sqlite3"))
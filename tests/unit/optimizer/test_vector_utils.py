@@ -0,0 +1,88 @@
+import os
+import threading
+import pytest
+from optimizer.utils import vector_utils
+from optimizer.utils.vector_utils import (
+    get_shared_vector_db,
+    invalidate_vector_db,
+    publish_snapshot,
+    staging_path,
+)
+
+
+class FakeChroma:
+    instances = 0
+
+    def __init__(self, persist_directory, embedding_function, collection_name):
+        FakeChroma.instances += 1
+        self.persist_directory = persist_directory
+        self.embedding_function = embedding_function
+        self.collection_name = collection_name
+
+
+@pytest.fixture(autouse=True)
+def fake_clients(monkeypatch):
+    FakeChroma.instances = 0
+    monkeypatch.setitem(vector_utils.VECTOR_STORES, "chroma", FakeChroma)
+    monkeypatch.setattr(vector_utils, "create_embeddings", lambda backend, model: model)
+    invalidate_vector_db()
+    yield
+    invalidate_vector_db()
+
+
+@pytest.mark.unit
+def test_handles_are_reused_per_path_collection_and_model(tmp_path):
+    db = str(tmp_path / "db")
+    handle = get_shared_vector_db(db, "kb", "model-a")
+
+    assert get_shared_vector_db(db, "kb", "model-a") is handle
+    assert get_shared_vector_db(db + "/.", "kb", "model-a") is handle
+    assert get_shared_vector_db(db, "other", "model-a") is not handle
+    assert get_shared_vector_db(db, "kb", "model-b") is not handle
+    assert FakeChroma.instances == 3
+
+
+@pytest.mark.unit
+def test_invalidate_drops_only_that_path(tmp_path):
+    first = get_shared_vector_db(str(tmp_path / "one"), "kb", "m")
+    second = get_shared_vector_db(str(tmp_path / "two"), "kb", "m")
+
+    invalidate_vector_db(str(tmp_path / "one"))
+
+    assert get_shared_vector_db(str(tmp_path / "one"), "kb", "m") is not first
+    assert get_shared_vector_db(str(tmp_path / "two"), "kb", "m") is second
+
+
+@pytest.mark.unit
+def test_concurrent_callers_share_one_handle(tmp_path):
+    handles = []
+    threads = [
+        threading.Thread(target=lambda: handles.append(get_shared_vector_db(str(tmp_path), "kb", "m")))
+        for _ in range(16)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert FakeChroma.instances == 1
+    assert all(handle is handles[0] for handle in handles)
+
+
+@pytest.mark.unit
+def test_publishing_leaves_a_sibling_dbs_snapshots_alone(tmp_path):
+    def publish(db):
+        os.makedirs(staging_path(db))
+        publish_snapshot(staging_path(db), db)
+        return os.path.realpath(db)
+
+    db, sibling = str(tmp_path / "vector_db"), str(tmp_path / "vector_db-test")
+    sibling_snapshot = publish(sibling)
+    first = publish(db)
+    for _ in range(3):
+        publish(db)
+
+    assert os.path.isdir(sibling_snapshot)
+    assert not os.path.exists(first)
+    assert len(vector_utils._snapshot_paths(db)) == 2
+    assert vector_utils._snapshot_paths(sibling) == [sibling_snapshot]